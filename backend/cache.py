@@ -0,0 +1,159 @@
+# Daemon Cache Tier
+# In-process TTL caches, optionally shared across worker processes over a local socket
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# --- Configuration ---
+CACHE_SOCKET_ENV = "DAEMON_CACHE_SOCKET"  # Set by serve.py when a shared cache server is running
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_CLIENT_TIMEOUT = 0.5  # Seconds a worker waits on the cache server before treating it as a miss
+
+_MISS = object()
+
+
+class LocalCache:
+    """Thread-safe TTL cache with LRU eviction, private to one process."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[(namespace, key)]
+                return default
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+
+# --- Shared Cache Server (runs in the serve.py master process) ---
+
+class _CacheRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        cache: LocalCache = self.server.cache
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request["op"]
+                if op == "get":
+                    value = cache.get(request["ns"], request["key"], _MISS)
+                    response = {"hit": False} if value is _MISS else {"hit": True, "value": value}
+                elif op == "set":
+                    cache.set(request["ns"], request["key"], request["value"], request["ttl"])
+                    response = {"ok": True}
+                elif op == "delete":
+                    cache.delete(request["ns"], request["key"])
+                    response = {"ok": True}
+                else:
+                    response = {"error": f"unknown op {op}"}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class SharedCacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves one LocalCache to every worker process over a Unix domain socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if os.path.exists(path):
+            os.remove(path)
+        self.cache = LocalCache(max_entries)
+        super().__init__(path, _CacheRequestHandler)
+        # Only processes running as this user may read cached metadata
+        os.chmod(path, 0o600)
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="shared-cache", daemon=True)
+        thread.start()
+        return thread
+
+
+class SharedCacheClient:
+    """Same interface as LocalCache, backed by a SharedCacheServer.
+
+    Values must be JSON-serializable. If the server can't be reached or
+    doesn't answer within `timeout`, the client behaves as a cache that
+    always misses, so requests still succeed.
+    """
+
+    def __init__(self, path: str, timeout: float = DEFAULT_CLIENT_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._pid = None
+
+    def _call(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            try:
+                if self._sock is None or self._pid != os.getpid():
+                    # Never reuse a connection inherited across fork
+                    self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    self._sock.settimeout(self.timeout)
+                    self._sock.connect(self.path)
+                    self._file = self._sock.makefile("rwb")
+                    self._pid = os.getpid()
+                self._file.write(json.dumps(request, default=str).encode() + b"\n")
+                self._file.flush()
+                return json.loads(self._file.readline())
+            except (OSError, ValueError) as e:  # socket.timeout is an OSError
+                logging.warning(f"Shared cache unavailable: {e}")
+                # Closed even on a timeout, so a late reply can't be read as the answer to the next request
+                if self._sock is not None:
+                    self._sock.close()
+                self._sock = None
+                return None
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        response = self._call({"op": "get", "ns": namespace, "key": key})
+        if not response or not response.get("hit"):
+            return default
+        return response["value"]
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        self._call({"op": "set", "ns": namespace, "key": key, "value": value, "ttl": ttl})
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._call({"op": "delete", "ns": namespace, "key": key})
+
+
+_cache = None
+
+
+def get_cache():
+    """Returns the process-wide cache: shared if serve.py started a cache server, local otherwise."""
+    global _cache
+    if _cache is None:
+        path = os.environ.get(CACHE_SOCKET_ENV)
+        _cache = SharedCacheClient(path) if path else LocalCache()
+    return _cache
@@ -0,0 +1,305 @@
+# Daemon Execution Recorder
+# Batched, append-only recording of execution results for the history UI
+
+import contextlib
+import fcntl
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+
+# --- Configuration ---
+EXECUTIONS_COLLECTION = "executions"  # Firestore collection backing the history UI
+FIRESTORE_MAX_BATCH_SIZE = 500  # Firestore limit on writes per batch
+DEFAULT_MAX_BUFFER = 1000  # Ring buffer capacity before records spill to disk
+DEFAULT_FLUSH_SIZE = 100  # Flush once this many records are buffered
+DEFAULT_FLUSH_INTERVAL = 5.0  # ...or once this many seconds have passed
+
+
+# --- Stores ---
+
+class FirestoreExecutionStore:
+    """Writes execution records to Firestore using batched writes.
+
+    One batch commit replaces up to 500 individual document writes, so a
+    burst of short webhook executions costs a handful of round trips
+    instead of one per execution.
+    """
+
+    def __init__(self, db, collection: str = EXECUTIONS_COLLECTION):
+        self.db = db
+        self.collection = collection
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        collection = self.db.collection(self.collection)
+        for start in range(0, len(records), FIRESTORE_MAX_BATCH_SIZE):
+            batch = self.db.batch()
+            for record in records[start:start + FIRESTORE_MAX_BATCH_SIZE]:
+                batch.set(collection.document(record["execution_id"]), record)
+            batch.commit()
+
+    def stream(self) -> Iterable[Dict[str, Any]]:
+        for doc in self.db.collection(self.collection).stream():
+            yield doc.to_dict()
+
+
+class LocalExecutionStore:
+    """In-memory stand-in for FirestoreExecutionStore (tests, local analytics)."""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.batches_written = 0
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self.records[record["execution_id"]] = dict(record)
+        self.batches_written += 1
+
+    def stream(self) -> Iterable[Dict[str, Any]]:
+        return iter(list(self.records.values()))
+
+
+# --- Recorder ---
+
+class ExecutionRecorder:
+    """Buffers execution records in memory and flushes them in batches.
+
+    Records are held in a bounded ring buffer and written to the store when
+    either `flush_size` records are buffered or `flush_interval` seconds have
+    passed since the last flush. If the buffer overflows, or a flush fails,
+    records are appended to a local spill file instead of being dropped; the
+    spill file is replayed the next time a recorder is created on the same
+    path. Records are keyed by `execution_id`, so a replayed record simply
+    overwrites any copy that made it to the store before a crash.
+    """
+
+    def __init__(
+        self,
+        store,
+        spill_path: str,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        replay_on_start: bool = True,
+    ):
+        if flush_size > max_buffer:
+            raise ValueError("flush_size must not exceed max_buffer")
+        self.store = store
+        self.spill_path = spill_path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if replay_on_start:
+            self.replay_spill()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, execution: Dict[str, Any]) -> str:
+        """Buffers one execution record and returns its execution_id."""
+        execution = dict(execution)
+        execution.setdefault("execution_id", uuid.uuid4().hex)
+        execution.setdefault("recorded_at", time.time())
+
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                # Ring buffer is full; keep the oldest record on disk rather than losing it
+                self._spill([self._buffer.popleft()])
+            self._buffer.append(execution)
+            due = (
+                len(self._buffer) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        if due:
+            self.flush()
+        return execution["execution_id"]
+
+    def flush(self) -> int:
+        """Writes all buffered records to the store. Returns the number written."""
+        with self._lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+
+        if not records:
+            return 0
+
+        try:
+            self.store.write_batch(records)
+        except Exception as e:
+            logging.error(f"Failed to flush {len(records)} execution records, spilling to disk: {e}")
+            with self._lock:
+                self._spill(records)
+            return 0
+
+        logging.info(f"Flushed {len(records)} execution records")
+        return len(records)
+
+    def replay_spill(self) -> int:
+        """Writes any records left in the spill file to the store.
+
+        Several processes may share `spill_path` (the workers started by
+        serve.py). The cross-process lock is held only to claim the spill
+        file by renaming it to `<spill_path>.replay.<pid>.<id>`; the store write
+        happens after the lock is released, so a slow or failing replay never
+        blocks other workers from spilling. If the write fails, the records
+        are appended to the spill file again. Claims left behind by crashed
+        processes are picked up by the next replay. Returns the number of
+        records replayed.
+        """
+        claim_path = f"{self.spill_path}.replay.{os.getpid()}.{uuid.uuid4().hex}"
+        with self._spill_lock():
+            for path in [self.spill_path] + self._orphaned_claims():
+                if os.path.exists(path):
+                    _move_lines(path, claim_path)
+        if not os.path.exists(claim_path):
+            return 0
+
+        records = []
+        with open(claim_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    logging.warning(f"Skipping corrupt line in {claim_path}")
+
+        try:
+            if records:
+                self.store.write_batch(records)
+        except Exception as e:
+            logging.error(f"Failed to replay {len(records)} spilled execution records: {e}")
+            with self._lock:
+                self._spill(records)
+            os.remove(claim_path)
+            return 0
+
+        os.remove(claim_path)
+        if records:
+            logging.info(f"Replayed {len(records)} spilled execution records")
+        return len(records)
+
+    def _orphaned_claims(self) -> List[str]:
+        """Claim files whose owning process is gone. Caller holds the spill lock."""
+        orphans = []
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.replay*"):
+            parts = path[len(self.spill_path):].split(".")  # "", "replay", pid, id
+            if len(parts) > 2 and parts[2].isdigit() and _process_alive(int(parts[2])):
+                continue  # Its process is still replaying it
+            orphans.append(path)
+        return orphans
+
+    def start(self) -> None:
+        """Starts a background thread that flushes on the time threshold while idle."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="execution-recorder", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stops the background thread and flushes whatever is still buffered."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    @contextlib.contextmanager
+    def _spill_lock(self) -> Iterator[None]:
+        # Held across processes, so a spill never lands in a file another worker is claiming
+        with open(f"{self.spill_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _spill(self, records: List[Dict[str, Any]]) -> None:
+        # Caller holds self._lock
+        with self._spill_lock(), open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str, separators=(",", ":")))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _move_lines(src: str, dst: str) -> None:
+    """Moves a JSONL file to `dst`, appending if `dst` already exists."""
+    if not os.path.exists(dst):
+        os.replace(src, dst)
+        return
+    with open(src, "rb") as f_src, open(dst, "ab") as f_dst:
+        if f_dst.tell() > 0:
+            f_dst.write(b"\n")  # Ends a torn final line so it can't swallow the next record
+        shutil.copyfileobj(f_src, f_dst)
+    os.remove(src)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by someone else
+    return True
+
+
+# --- Analytics Export ---
+
+def export_columnar(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """Exports execution records as gzip-compressed columnar JSON.
+
+    Each field becomes one list of values, which compresses far better than
+    a list of per-record objects because repeated keys disappear and similar
+    values sit next to each other. Works with any store's `stream()`.
+    Returns the number of records exported.
+    """
+    columns: Dict[str, List[Any]] = {}
+    count = 0
+    for record in records:
+        for name in record.keys() - columns.keys():
+            # Backfill a column first seen part-way through the export
+            columns[name] = [None] * count
+        for name, values in columns.items():
+            values.append(record.get(name))
+        count += 1
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"rows": count, "columns": columns}, f, default=str, separators=(",", ":"))
+    return count
+
+
+def read_columnar(path: str) -> List[Dict[str, Any]]:
+    """Reads an export written by export_columnar back into records."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    columns = data["columns"]
+    return [
+        {name: values[i] for name, values in columns.items()}
+        for i in range(data["rows"])
+    ]
@@ -2,7 +2,20 @@
 # FastAPI-based backend for AI-driven automation platform
 
 import os
-from fastapi import FastAPI, HTTPException, status
+import base64
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# serve.py forks workers after importing this module. gRPC reads this setting when it is
+# first imported (by the Google client libraries below), so it has to be set before them.
+os.environ.setdefault("GRPC_ENABLE_FORK_SUPPORT", "1")
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
 import uvicorn
 import google.cloud.logging
@@ -12,33 +25,59 @@ from vertexai.generative_models import GenerativeModel
 from google.cloud import secretmanager
 from google.cloud import storage
 from google.cloud import firestore
+from google.cloud import pubsub_v1
+from google.cloud.firestore_v1.base_query import FieldFilter
+from retry_queue import RetryQueue, is_transient
+from cache import get_cache
 
 # --- Logging Setup ---
-# Set up Google Cloud Logging if running in GCP, otherwise use basic logging
-# This assumes the execution environment has the necessary credentials
-try:
-    client = google.cloud.logging.Client()
-    # Attaches a Google Cloud Logging handler to the root logger
-    client.setup_logging()
-    logging.info("Google Cloud Logging enabled.")
-except google.auth.exceptions.DefaultCredentialsError:
-    logging.basicConfig(level=logging.INFO)
-    logging.info("Default credentials not found. Using basic logging.")
+# Runs once per worker process from the startup hook, never at import time: the Cloud
+# Logging handler ships entries from a background thread over its own connection, and
+# neither survives the fork in serve.py.
+
+_logging_pid: Optional[int] = None
+
+
+def setup_logging() -> None:
+    """Sets up Google Cloud Logging if running in GCP, otherwise basic logging."""
+    global _logging_pid
+    if _logging_pid == os.getpid():
+        return
+    _logging_pid = os.getpid()
+    # This assumes the execution environment has the necessary credentials
+    try:
+        client = google.cloud.logging.Client()
+        # Attaches a Google Cloud Logging handler to the root logger
+        client.setup_logging()
+        logging.info("Google Cloud Logging enabled.")
+    except google.auth.exceptions.DefaultCredentialsError:
+        logging.basicConfig(level=logging.INFO)
+        logging.info("Default credentials not found. Using basic logging.")
 
 
 # --- Configuration (can be moved to a config file later) ---
 GCP_PROJECT_ID = os.environ.get("GCP_PROJECT_ID", "your-gcp-project-id")  # Replace default or set env
 GCS_BUCKET_NAME = os.environ.get("GCS_BUCKET_NAME", "your-daemon-code-bucket")  # Replace default or set env
 SECRET_MANAGER_SLACK_SECRET_NAME = "daemon-mvp-slack-token"  # Name of the secret to store Slack token in Secret Manager
-# Add other config like Pub/Sub topics later
-
-# Initialize Vertex AI
-try:
-    vertexai.init(project=GCP_PROJECT_ID, location="us-central1")
-    logging.info("Vertex AI initialized successfully.")
-except Exception as e:
-    logging.error(f"Failed to initialize Vertex AI: {e}")
-    # Continue without Vertex AI - endpoints will handle gracefully
+TRIGGER_TOPIC_NAME = os.environ.get("TRIGGER_TOPIC_NAME", "daemon-workflow-triggers")  # Pub/Sub topic Execution Workers subscribe to
+MAX_TRIGGER_PAYLOAD_BYTES = int(os.environ.get("MAX_TRIGGER_PAYLOAD_BYTES", 1024 * 1024))  # Pub/Sub allows up to 10 MB per message
+WORKFLOW_FIELDS = ("workflow_id", "code_path", "code_sha256", "webhook_url", "created_at", "status")  # Fields clients may project
+MAX_WORKFLOW_PAGE_SIZE = 100
+MAX_DEAD_LETTER_PAGE_SIZE = 100
+GENERATION_CACHE_TTL = 3600  # Seconds a generated workflow is reused for an identical prompt
+METADATA_CACHE_TTL = 5  # Seconds workflow metadata is served without re-reading Firestore
+CODE_CACHE_TTL = 3600  # Seconds workflow code is kept in the cache tier (keyed by content hash, so never stale)
+RETRY_QUEUE_PATH = os.environ.get("RETRY_QUEUE_PATH", "/tmp/daemon-retry-queue.db")  # Local SQLite file for failed deliveries
+
+
+def init_vertex_ai() -> None:
+    """Initializes Vertex AI (per worker, like logging)."""
+    try:
+        vertexai.init(project=GCP_PROJECT_ID, location="us-central1")
+        logging.info("Vertex AI initialized successfully.")
+    except Exception as e:
+        logging.error(f"Failed to initialize Vertex AI: {e}")
+        # Continue without Vertex AI - endpoints will handle gracefully
 
 
 # --- Pydantic Models for Request/Response ---
@@ -72,6 +111,16 @@ class DeployWorkflowResponse(BaseModel):
     webhook_url: str = Field(..., description="The unique URL for the webhook trigger")
 
 
+class TriggerWorkflowResponse(BaseModel):
+    message: str = Field(default="Workflow triggered.")
+    message_id: str = Field(..., description="Pub/Sub message ID of the queued trigger")
+
+
+class WorkflowListResponse(BaseModel):
+    workflows: List[Dict[str, Any]] = Field(..., description="One page of workflows, newest first")
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` to fetch the next page; null on the last page")
+
+
 # --- FastAPI App Instance ---
 app = FastAPI(
     title="Daemon Backend API (MVP)",
@@ -80,6 +129,13 @@ app = FastAPI(
 )
 
 
+@app.on_event("startup")
+async def init_worker():
+    # Under serve.py this runs in each worker after the fork; Google clients must be created here
+    setup_logging()
+    init_vertex_ai()
+
+
 # --- API Endpoints ---
 
 @app.get("/health", status_code=status.HTTP_200_OK)
@@ -96,16 +152,37 @@ async def generate_workflow(request: GenerateWorkflowRequest):
     """
     logging.info(f"Generate workflow request received with prompt: {request.prompt[:50]}...")
     
+    # Generate a simple workflow ID (in production, use UUID)
+    workflow_id = f"wf-{hashlib.md5(request.prompt.encode()).hexdigest()[:12]}"
+    
+    # The same prompt yields the same workflow_id, so reuse recent code instead of calling the model again
+    cached_code = get_cache().get("generation", workflow_id)
+    if cached_code is not None:
+        logging.info(f"Returning cached workflow code for {workflow_id}")
+        return GenerateWorkflowResponse(
+            generated_code=cached_code,
+            workflow_id=workflow_id
+        )
 
-    try:        model = GenerativeModel("gemini-2.5-flash")
-        # Initialize Gemini 1.5 Flash model        # Build the prompt with role and context
+    try:
+        # Initialize Gemini 2.5 Flash model
+        model = GenerativeModel("gemini-2.5-flash")
+        
+        # Build the prompt with role and context
         system_prompt = (
             "You are an expert Python developer creating automation scripts for the Daemon platform. "
             "Your task is to generate clean, production-ready Python code based on the user's request. "
             "\n\nAvailable SDK functions you can use:"
             "\n- get_trigger_data(): Returns the data that triggered this workflow"
+            "\n- iter_trigger_items(key=None): Iterates over a large array in the trigger data one item at a time"
             "\n- get_secret(secret_name): Retrieves a secret from Secret Manager"
-            "\n- post_slack_message(message): Posts a message to Slack"
+            "\n- post_slack_message(token, channel, text): Posts a message to Slack"
+            "\n- http_request(method, url, **kwargs): Calls any HTTP API (kwargs: json, data, headers, params, timeout); "
+            "returns a dict with status_code, headers and body"
+            "\n- get_state(key, default=None): Reads a value saved by an earlier run of this workflow"
+            "\n- set_state(key, value): Saves a JSON-compatible value for later runs (keep state small, e.g. a cursor)"
+            "\n- increment_state(key, amount=1): Adds to a counter and returns the new value"
+            "\n- delete_state(key): Removes a saved value"
             "\n\nGenerate ONLY the Python code without any markdown formatting or explanation."
         )
         
@@ -122,10 +199,7 @@ async def generate_workflow(request: GenerateWorkflowRequest):
         )
         
         generated_code = response.text.strip()
-        
-        # Generate a simple workflow ID (in production, use UUID)
-        import hashlib
-        workflow_id = f"wf-{hashlib.md5(request.prompt.encode()).hexdigest()[:12]}"
+        get_cache().set("generation", workflow_id, generated_code, GENERATION_CACHE_TTL)
         
         logging.info(f"Successfully generated workflow code for prompt: {request.prompt[:50]}...")
     except Exception as e:
@@ -210,54 +284,160 @@ async def save_credential(request: SaveCredentialRequest):
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to save credential: {str(e)}"
-            )    return SaveCredentialResponse(
+            )
+    
+    return SaveCredentialResponse(
         message="Credential saved successfully.",
         secret_version_id=secret_version_id
     )
 
 
+def _webhook_url(workflow_id: str) -> str:
+    # Construct API Gateway webhook URL (manually configured for MVP)
+    # Format: https://your-api-gateway-url/invoke/{workflow_id}
+    # TODO: Replace with actual API Gateway URL after manual setup
+    return f"https://daemon-webhook-placeholder-run.app/trigger/{workflow_id}"
+
+
+def _store_workflow(workflow_id: str, generated_code: str) -> None:
+    """Saves workflow code to GCS and its metadata to Firestore (safe to repeat)."""
+    # Initialize GCS client
+    storage_client = storage.Client()
+    bucket = storage_client.bucket(GCS_BUCKET_NAME)
+    
+    # Save generated code to GCS
+    # Path format: gs://BUCKET_NAME/{workflow_id}/main.py
+    code_path = f"{workflow_id}/main.py"
+    blob = bucket.blob(code_path)
+    blob.upload_from_string(generated_code, content_type='text/x-python')
+    
+    logging.info(f"Saved workflow code to gs://{GCS_BUCKET_NAME}/{code_path}")
+    
+    # Initialize Firestore client
+    db = firestore.Client()
+    
+    # Save workflow metadata to Firestore
+    # Workers listening on this collection treat a new code_sha256 as an invalidation notice
+    workflow_doc = db.collection('workflows').document(workflow_id)
+    workflow_doc.set({
+        'workflow_id': workflow_id,
+        'code_path': f"gs://{GCS_BUCKET_NAME}/{code_path}",
+        'code_sha256': hashlib.sha256(generated_code.encode()).hexdigest(),
+        'webhook_url': _webhook_url(workflow_id),
+        'created_at': firestore.SERVER_TIMESTAMP,
+        'status': 'deployed'
+    })
+    
+    get_cache().delete("workflow_metadata", workflow_id)
+    
+    logging.info(f"Saved workflow metadata to Firestore for {workflow_id}")
+
+
+# --- Pub/Sub Publisher ---
+# One publisher per worker process: each client owns a gRPC channel and a batching thread,
+# so creating one per trigger costs far more than publishing. It is created on first use,
+# which under serve.py is always after the fork.
+
+_publisher: Optional[pubsub_v1.PublisherClient] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> pubsub_v1.PublisherClient:
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = pubsub_v1.PublisherClient()
+    return _publisher
+
+
+def _publish_trigger(workflow_id: str, body: bytes, content_type: str) -> str:
+    """Publishes a raw trigger body to the trigger topic. Returns the message ID.
+
+    Blocks until Pub/Sub acknowledges the message; call it from a thread,
+    not the event loop.
+    """
+    publisher = get_publisher()
+    topic_path = publisher.topic_path(GCP_PROJECT_ID, TRIGGER_TOPIC_NAME)
+    future = publisher.publish(
+        topic_path,
+        body,
+        workflow_id=workflow_id,
+        content_type=content_type,
+    )
+    return future.result()
+
+
+# --- Retry Queue ---
+# Operations that fail because GCS, Firestore or Pub/Sub is briefly unavailable are
+# stored locally and retried in the background instead of failing the request.
+
+_retry_queue: Optional[RetryQueue] = None
+
+
+def get_retry_queue() -> RetryQueue:
+    global _retry_queue
+    if _retry_queue is None:
+        _retry_queue = RetryQueue(RETRY_QUEUE_PATH)
+        _retry_queue.register(
+            "deploy_workflow",
+            lambda payload: _store_workflow(payload["workflow_id"], payload["generated_code"])
+        )
+        _retry_queue.register(
+            "trigger_workflow",
+            lambda payload: _publish_trigger(
+                payload["workflow_id"], base64.b64decode(payload["body"]), payload["content_type"]
+            )
+        )
+    return _retry_queue
+
+
+@app.on_event("startup")
+async def start_retry_queue():
+    get_retry_queue().start()
+
+
+@app.on_event("shutdown")
+async def stop_retry_queue():
+    if _retry_queue is not None:
+        _retry_queue.close()
+
+
+@app.on_event("shutdown")
+async def stop_publisher():
+    if _publisher is not None:
+        # Sends any batched messages before the worker exits
+        await run_in_threadpool(_publisher.stop)
+
+
 @app.post("/deploy-workflow", response_model=DeployWorkflowResponse, status_code=status.HTTP_201_CREATED)
-async def deploy_workflow(request: DeployWorkflowRequest):
+async def deploy_workflow(request: DeployWorkflowRequest, response: Response):
     """
     (MVP Stub) Deploys generated code to Cloud Run/Functions and sets up webhook trigger.
+
+    If GCS or Firestore is temporarily unavailable, the deployment is queued
+    for retry and 202 Accepted is returned instead of 500.
     """
     logging.info(f"Deploy workflow request for workflow_id: {request.workflow_id}")
+    webhook_url = _webhook_url(request.workflow_id)
     
     try:
-        # Initialize GCS client
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        
-        # Save generated code to GCS
-        # Path format: gs://BUCKET_NAME/{workflow_id}/main.py
-        code_path = f"{request.workflow_id}/main.py"
-        blob = bucket.blob(code_path)
-        blob.upload_from_string(request.generated_code, content_type='text/x-python')
-        
-        logging.info(f"Saved workflow code to gs://{GCS_BUCKET_NAME}/{code_path}")
-        
-        # Initialize Firestore client
-        db = firestore.Client()
-        
-        # Construct API Gateway webhook URL (manually configured for MVP)
-        # Format: https://your-api-gateway-url/invoke/{workflow_id}
-        # TODO: Replace with actual API Gateway URL after manual setup
-        webhook_url = f"https://daemon-webhook-placeholder-run.app/trigger/{request.workflow_id}"
-        
-        # Save workflow metadata to Firestore
-        workflow_doc = db.collection('workflows').document(request.workflow_id)
-        workflow_doc.set({
-            'workflow_id': request.workflow_id,
-            'code_path': f"gs://{GCS_BUCKET_NAME}/{code_path}",
-            'webhook_url': webhook_url,
-            'created_at': firestore.SERVER_TIMESTAMP,
-            'status': 'deployed'
-        })
-        
-        logging.info(f"Saved workflow metadata to Firestore for {request.workflow_id}")
+        _store_workflow(request.workflow_id, request.generated_code)
         logging.info(f"Webhook URL: {webhook_url}")
         
     except Exception as e:
+        if is_transient(e):
+            logging.warning(f"Transient error deploying workflow, queuing for retry: {e}")
+            get_retry_queue().enqueue(
+                "deploy_workflow",
+                {"workflow_id": request.workflow_id, "generated_code": request.generated_code},
+                error=str(e)
+            )
+            response.status_code = status.HTTP_202_ACCEPTED
+            return DeployWorkflowResponse(
+                message="Workflow deployment queued for retry.",
+                webhook_url=webhook_url
+            )
         logging.error(f"Error deploying workflow: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -269,11 +449,354 @@ async def deploy_workflow(request: DeployWorkflowRequest):
     )
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parses a comma-separated `fields` projection, or returns None for all fields."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(WORKFLOW_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(WORKFLOW_FIELDS)}"
+        )
+    return requested
+
+
+def _encode_cursor(created_at: datetime, doc_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), doc_id
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+# Plain def endpoints run in FastAPI's threadpool, so blocking Firestore reads don't stall the event loop
+@app.get("/workflows", response_model=WorkflowListResponse)
+def list_workflows(
+    limit: int = Query(default=20, ge=1, le=MAX_WORKFLOW_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from a previous page"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+):
+    """
+    Lists deployed workflows one page at a time, newest first.
+
+    Only `limit` documents are read per request, and `fields` limits which
+    fields Firestore sends back. Filtering on status requires a composite
+    index on (status, created_at desc, __name__ desc).
+    """
+    projection = _parse_fields(fields)
+    logging.info(f"List workflows request: limit={limit}, status={status_filter}, fields={projection}")
+
+    try:
+        db = firestore.Client()
+        query = db.collection('workflows')
+        if status_filter:
+            query = query.where(filter=FieldFilter('status', '==', status_filter))
+        if created_after:
+            query = query.where(filter=FieldFilter('created_at', '>=', created_after))
+        if created_before:
+            query = query.where(filter=FieldFilter('created_at', '<', created_before))
+        # Document ID breaks ties between workflows created in the same instant
+        query = query.order_by('created_at', direction=firestore.Query.DESCENDING)
+        query = query.order_by('__name__', direction=firestore.Query.DESCENDING)
+        if projection is not None:
+            # created_at is always read because the next cursor is built from it
+            query = query.select(sorted(set(projection) | {'created_at'}))
+        if cursor:
+            cursor_created_at, cursor_doc_id = _decode_cursor(cursor)
+            query = query.start_after({'created_at': cursor_created_at, '__name__': cursor_doc_id})
+
+        # Fetch one extra document to learn whether another page exists
+        docs = list(query.limit(limit + 1).stream())
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error listing workflows: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list workflows: {str(e)}"
+        )
+
+    page = docs[:limit]
+    workflows = []
+    for doc in page:
+        data = doc.to_dict()
+        if projection is not None:
+            data = {name: data.get(name) for name in projection}
+        workflows.append(data)
+
+    next_cursor = None
+    if len(docs) > limit:
+        last = page[-1]
+        next_cursor = _encode_cursor(last.to_dict()['created_at'], last.id)
+
+    return WorkflowListResponse(workflows=workflows, next_cursor=next_cursor)
+
+
+def _load_workflow_metadata(workflow_id: str) -> Dict[str, Any]:
+    """Returns {"update_time", "data"} for a workflow, from the cache tier when possible."""
+    # Polling clients hit the shared cache; deploys invalidate it in _store_workflow
+    cache = get_cache()
+    cached = cache.get("workflow_metadata", workflow_id)
+    if cached is None:
+        try:
+            db = firestore.Client()
+            doc = db.collection('workflows').document(workflow_id).get()
+        except Exception as e:
+            logging.error(f"Error reading workflow: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to get workflow: {str(e)}"
+            )
+
+        if not doc.exists:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workflow {workflow_id} not found")
+
+        cached = {"update_time": doc.update_time.isoformat(), "data": jsonable_encoder(doc.to_dict())}
+        cache.set("workflow_metadata", workflow_id, cached, METADATA_CACHE_TTL)
+    return cached
+
+
+@app.get("/workflows/{workflow_id}")
+def get_workflow(
+    workflow_id: str,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """
+    Returns one workflow's metadata with an ETag.
+
+    Clients polling for changes send the ETag back in If-None-Match and get
+    304 Not Modified with an empty body until the document changes.
+    """
+    projection = _parse_fields(fields)
+    logging.info(f"Get workflow request for workflow_id: {workflow_id}")
+
+    cached = _load_workflow_metadata(workflow_id)
+
+    # update_time changes on every write, so it identifies this version of the document
+    version = f"{cached['update_time']}|{','.join(projection or [])}"
+    etag = f'"{hashlib.sha256(version.encode()).hexdigest()[:32]}"'
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    data = cached["data"]
+    if projection is not None:
+        data = {name: data.get(name) for name in projection}
+    return data
+
+
+def _load_workflow_code(workflow_id: str, metadata: Dict[str, Any]):
+    """Returns (code_bytes, code_sha256) for the workflow's current code."""
+    code_sha256 = metadata.get("code_sha256")
+    cache = get_cache()
+    if code_sha256:
+        code = cache.get("workflow_code", code_sha256)
+        if code is not None:
+            return code.encode(), code_sha256
+
+    try:
+        storage_client = storage.Client()
+        bucket = storage_client.bucket(GCS_BUCKET_NAME)
+        code = bucket.blob(f"{workflow_id}/main.py").download_as_bytes()
+    except Exception as e:
+        logging.error(f"Error downloading workflow code: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get workflow code: {str(e)}"
+        )
+
+    # Hash what was actually downloaded, so the ETag always matches the body
+    code_sha256 = hashlib.sha256(code).hexdigest()
+    cache.set("workflow_code", code_sha256, code.decode(), CODE_CACHE_TTL)
+    if not metadata.get("code_sha256"):
+        _backfill_code_sha256(workflow_id, code_sha256)
+    return code, code_sha256
+
+
+def _backfill_code_sha256(workflow_id: str, code_sha256: str) -> None:
+    """Stores the content hash of a workflow deployed before deploys recorded one.
+
+    Without it every request for the workflow's code downloads from GCS.
+    The hash is only added if the document still has none, so it can never
+    replace the hash of a deploy that landed after the download.
+    """
+    try:
+        db = firestore.Client()
+        workflow_doc = db.collection('workflows').document(workflow_id)
+
+        @firestore.transactional
+        def backfill(transaction):
+            snapshot = workflow_doc.get(transaction=transaction)
+            if snapshot.exists and not (snapshot.to_dict() or {}).get('code_sha256'):
+                transaction.update(workflow_doc, {'code_sha256': code_sha256})
+
+        backfill(db.transaction())
+    except Exception as e:
+        # Best effort: the code is still served, just downloaded again next time
+        logging.warning(f"Could not backfill code_sha256 for {workflow_id}: {e}")
+        return
+    get_cache().delete("workflow_metadata", workflow_id)
+
+
+@app.get("/workflows/{workflow_id}/code")
+def get_workflow_code(workflow_id: str, if_none_match: Optional[str] = Header(default=None)):
+    """
+    Returns a workflow's current code with its SHA-256 content hash as the ETag.
+
+    Execution Workers revalidate their on-disk copy with If-None-Match; when
+    the hash still matches they get 304 and no code is transferred or read
+    from GCS.
+    """
+    metadata = _load_workflow_metadata(workflow_id)["data"]
+    code_sha256 = metadata.get("code_sha256")
+    if code_sha256 and if_none_match and f'"{code_sha256}"' in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": f'"{code_sha256}"'})
+
+    code, code_sha256 = _load_workflow_code(workflow_id, metadata)
+    return Response(
+        content=code,
+        media_type="text/x-python",
+        headers={
+            "ETag": f'"{code_sha256}"',
+            "Cache-Control": "no-cache",
+            "Content-Location": f"/workflows/{workflow_id}/code/{code_sha256}",
+        }
+    )
+
+
+@app.get("/workflows/{workflow_id}/code/{code_sha256}")
+def get_workflow_code_by_hash(workflow_id: str, code_sha256: str):
+    """
+    Returns the workflow code with the given content hash.
+
+    The response for a hash never changes, so it may be cached forever.
+    Only the currently deployed version is available.
+    """
+    metadata = _load_workflow_metadata(workflow_id)["data"]
+    if metadata.get("code_sha256") not in (None, code_sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Code version {code_sha256} not found")
+
+    code, current_sha256 = _load_workflow_code(workflow_id, metadata)
+    if current_sha256 != code_sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Code version {code_sha256} not found")
+    return Response(
+        content=code,
+        media_type="text/x-python",
+        headers={
+            "ETag": f'"{code_sha256}"',
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
+    )
+
+
+@app.post("/trigger/{workflow_id}", response_model=TriggerWorkflowResponse, status_code=status.HTTP_202_ACCEPTED)
+async def trigger_workflow(workflow_id: str, request: Request):
+    """
+    Receives a webhook call and queues it for the Execution Workers.
+
+    The body is never parsed here: the raw bytes are read up to
+    MAX_TRIGGER_PAYLOAD_BYTES and published to Pub/Sub unchanged, and the
+    worker parses them lazily when the workflow calls get_trigger_data().
+    """
+    logging.info(f"Trigger received for workflow_id: {workflow_id}")
+
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Trigger payload exceeds {MAX_TRIGGER_PAYLOAD_BYTES} bytes"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_TRIGGER_PAYLOAD_BYTES:
+        raise too_large
+
+    # Stream the body so an oversized request is cut off without being buffered in full
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > MAX_TRIGGER_PAYLOAD_BYTES:
+            raise too_large
+        body.extend(chunk)
+
+    content_type = request.headers.get("content-type", "application/json")
+    try:
+        # Waiting for the Pub/Sub ack would otherwise block every request on this worker
+        message_id = await run_in_threadpool(_publish_trigger, workflow_id, bytes(body), content_type)
+        logging.info(f"Queued trigger for {workflow_id} as message {message_id} ({len(body)} bytes)")
+    except Exception as e:
+        if is_transient(e):
+            logging.warning(f"Transient error publishing trigger, queuing for retry: {e}")
+            retry_id = get_retry_queue().enqueue(
+                "trigger_workflow",
+                {"workflow_id": workflow_id, "body": base64.b64encode(body).decode(), "content_type": content_type},
+                error=str(e)
+            )
+            return TriggerWorkflowResponse(
+                message="Workflow trigger queued for retry.",
+                message_id=f"retry-{retry_id}"
+            )
+        logging.error(f"Error queuing trigger: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to trigger workflow: {str(e)}"
+        )
+
+    return TriggerWorkflowResponse(
+        message="Workflow triggered.",
+        message_id=message_id
+    )
+
+
+@app.get("/retry-queue")
+async def retry_queue_status(limit: int = Query(default=20, ge=1, le=MAX_DEAD_LETTER_PAGE_SIZE)):
+    """
+    Returns pending and dead-lettered message counts plus the most recent dead letters.
+
+    Dead letters are listed without their payloads, which can be as large as
+    a trigger body; fetch one with GET /retry-queue/dead-letters/{message_id}.
+    """
+    queue = get_retry_queue()
+    return {**queue.stats(), "dead_letter_messages": queue.dead_letters(limit)}
+
+
+@app.get("/retry-queue/dead-letters/{message_id}")
+async def get_dead_letter(message_id: int):
+    """Returns one dead-lettered message, including its payload."""
+    dead_letter = get_retry_queue().dead_letter(message_id)
+    if dead_letter is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Dead letter {message_id} not found")
+    return dead_letter
+
+
+@app.post("/retry-queue/replay")
+async def replay_dead_letters(message_id: Optional[int] = None):
+    """Requeues one dead-lettered message, or all of them if no message_id is given."""
+    replayed = get_retry_queue().replay(message_id)
+    if message_id is not None and replayed == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Dead letter {message_id} not found")
+    return {"replayed": replayed}
+
+
 # --- Main Entry Point ---
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=int(os.environ.get("PORT", 8080)),
-        reload=True  # Enable auto-reload for development
-    )
+    if os.environ.get("DAEMON_ENV") == "production":
+        # Multi-process server with shared caches (see serve.py)
+        import serve
+        serve.main(app)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=int(os.environ.get("PORT", 8080)),
+            reload=True  # Enable auto-reload for development
+        )
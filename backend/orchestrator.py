@@ -0,0 +1,278 @@
+# Daemon DAG Orchestrator
+# Chains deployed workflows into a DAG and runs independent branches concurrently
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+# --- Configuration ---
+DAG_RUNS_COLLECTION = "dag_runs"  # Firestore collection holding run checkpoints
+DEFAULT_MAX_CONCURRENCY = 4
+
+STEP_SUCCEEDED = "succeeded"
+STEP_FAILED = "failed"
+STEP_SKIPPED = "skipped"
+
+TRIGGER_ALL_SUCCESS = "all_success"  # Run only if every upstream step succeeded
+TRIGGER_NONE_FAILED = "none_failed"  # Run if no upstream step failed and at least one succeeded
+
+
+# --- Pydantic Models for the DAG Definition ---
+
+class StepCondition(BaseModel):
+    source: str = Field(..., description="workflow_id of the upstream step whose output is inspected")
+    key: str = Field(..., description="Dot-separated path into the upstream output (e.g. 'result.status')")
+    equals: Any = Field(..., description="Value the path must equal for this step to run")
+
+    def evaluate(self, outputs: Dict[str, Any]) -> bool:
+        value = outputs.get(self.source)
+        for part in self.key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return False
+            value = value[part]
+        return value == self.equals
+
+
+class DagStep(BaseModel):
+    workflow_id: str = Field(..., description="Deployed workflow to run for this step")
+    depends_on: List[str] = Field(default_factory=list, description="workflow_ids that must finish first")
+    condition: Optional[StepCondition] = Field(default=None, description="Run only if this holds; otherwise skip")
+    trigger_rule: Literal["all_success", "none_failed"] = Field(
+        default=TRIGGER_ALL_SUCCESS,
+        description="When skipped upstream steps skip this one: 'all_success' if any was skipped, "
+                    "'none_failed' only if all were (e.g. a join after conditional branches)",
+    )
+    estimated_duration: float = Field(default=1.0, ge=0, description="Relative cost used to find the critical path")
+
+
+class WorkflowDAG(BaseModel):
+    steps: List[DagStep]
+
+    @model_validator(mode="after")
+    def check_graph(self) -> "WorkflowDAG":
+        ids = [step.workflow_id for step in self.steps]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each workflow_id may appear only once in a DAG")
+        known = set(ids)
+        for step in self.steps:
+            missing = [dep for dep in step.depends_on if dep not in known]
+            if missing:
+                raise ValueError(f"Step {step.workflow_id} depends on unknown steps: {missing}")
+            if step.condition and step.condition.source not in step.depends_on:
+                raise ValueError(f"Condition on {step.workflow_id} must reference one of its dependencies")
+        if len(self.topological_order()) != len(self.steps):
+            raise ValueError("Workflow DAG contains a cycle")
+        return self
+
+    def step_map(self) -> Dict[str, DagStep]:
+        return {step.workflow_id: step for step in self.steps}
+
+    def dependents(self) -> Dict[str, List[str]]:
+        result: Dict[str, List[str]] = {step.workflow_id: [] for step in self.steps}
+        for step in self.steps:
+            for dep in dict.fromkeys(step.depends_on):
+                result[dep].append(step.workflow_id)
+        return result
+
+    def topological_order(self) -> List[str]:
+        remaining = {step.workflow_id: len(set(step.depends_on)) for step in self.steps}
+        dependents = self.dependents()
+        ready = [wf for wf, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            wf = ready.pop()
+            order.append(wf)
+            for child in dependents[wf]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        return order
+
+    def critical_path_priority(self) -> Dict[str, float]:
+        """Longest estimated duration from each step to the end of the DAG.
+
+        Steps with the highest value lie on the critical path, so scheduling
+        them first keeps the slowest chain from waiting behind short branches.
+        """
+        steps = self.step_map()
+        dependents = self.dependents()
+        priority: Dict[str, float] = {}
+        for wf in reversed(self.topological_order()):
+            tail = max((priority[child] for child in dependents[wf]), default=0.0)
+            priority[wf] = steps[wf].estimated_duration + tail
+        return priority
+
+
+# --- Checkpoint Stores ---
+
+class LocalCheckpointStore:
+    """Keeps run checkpoints as one JSON file per run (local dev and tests)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.json")
+
+    def load(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._path(run_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, run_id: str, workflow_id: str, checkpoint: Dict[str, Any]) -> None:
+        steps = self.load(run_id)
+        steps[workflow_id] = checkpoint
+        tmp_path = f"{self._path(run_id)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(steps, f, default=str)
+        os.replace(tmp_path, self._path(run_id))
+
+
+class FirestoreCheckpointStore:
+    """Keeps run checkpoints in a single Firestore document per run."""
+
+    def __init__(self, db, collection: str = DAG_RUNS_COLLECTION):
+        self.db = db
+        self.collection = collection
+
+    def load(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        snapshot = self.db.collection(self.collection).document(run_id).get()
+        if not snapshot.exists:
+            return {}
+        return (snapshot.to_dict() or {}).get("steps", {})
+
+    def save(self, run_id: str, workflow_id: str, checkpoint: Dict[str, Any]) -> None:
+        self.db.collection(self.collection).document(run_id).set(
+            {"steps": {workflow_id: checkpoint}}, merge=True
+        )
+
+
+# --- Orchestrator ---
+
+class DagExecutionError(Exception):
+    """Raised when one or more steps fail; completed steps stay checkpointed."""
+
+    def __init__(self, run_id: str, failed: Dict[str, str], results: Dict[str, Dict[str, Any]]):
+        super().__init__(f"DAG run {run_id} failed at steps: {sorted(failed)}")
+        self.run_id = run_id
+        self.failed = failed
+        self.results = results
+
+
+RunWorkflow = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class DagOrchestrator:
+    """Runs a WorkflowDAG, executing independent branches concurrently.
+
+    `run_workflow(workflow_id, trigger_data)` executes a single deployed
+    workflow and returns its output. Root steps receive the run's trigger
+    data; downstream steps receive `{"trigger": ..., "upstream": {workflow_id: output}}`
+    as the value of `get_trigger_data()`.
+
+    Every finished step is checkpointed, so calling `run` again with the same
+    run_id after a failure resumes from the failed steps instead of redoing
+    the ones that already succeeded.
+    """
+
+    def __init__(self, run_workflow: RunWorkflow, checkpoints, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.run_workflow = run_workflow
+        self.checkpoints = checkpoints
+        self.max_concurrency = max_concurrency
+
+    async def run(self, dag: WorkflowDAG, run_id: str, trigger_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        steps = dag.step_map()
+        dependents = dag.dependents()
+        priority = dag.critical_path_priority()
+
+        results = await asyncio.to_thread(self.checkpoints.load, run_id)
+        # Steps removed from the DAG since the checkpoint was written are ignored
+        results = {
+            wf: r for wf, r in results.items()
+            if wf in steps and r.get("status") in (STEP_SUCCEEDED, STEP_SKIPPED)
+        }
+        if results:
+            logging.info(f"Resuming DAG run {run_id} with {len(results)} steps already complete")
+
+        waiting = {wf: len(set(step.depends_on)) for wf, step in steps.items()}
+        ready: List[tuple] = []
+        failed: Dict[str, str] = {}
+
+        def release(wf: str) -> None:
+            for child in dependents[wf]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    heapq.heappush(ready, (-priority[child], child))
+
+        # Steps completed in an earlier attempt no longer block their dependents
+        for wf in results:
+            for child in dependents[wf]:
+                waiting[child] -= 1
+        for wf, count in waiting.items():
+            if count == 0 and wf not in results:
+                heapq.heappush(ready, (-priority[wf], wf))
+
+        running: Dict[asyncio.Task, str] = {}
+        while ready or running:
+            while ready and len(running) < self.max_concurrency:
+                _, wf = heapq.heappop(ready)
+                step = steps[wf]
+                upstream = {dep: results[dep] for dep in step.depends_on}
+                skipped = [r["status"] == STEP_SKIPPED for r in upstream.values()]
+                if step.trigger_rule == TRIGGER_NONE_FAILED:
+                    upstream_skipped = bool(skipped) and all(skipped)
+                else:
+                    upstream_skipped = any(skipped)
+
+                if upstream_skipped or (
+                    step.condition
+                    and not step.condition.evaluate({dep: r.get("output") for dep, r in upstream.items()})
+                ):
+                    results[wf] = {"status": STEP_SKIPPED}
+                    await asyncio.to_thread(self.checkpoints.save, run_id, wf, results[wf])
+                    logging.info(f"DAG run {run_id}: skipped {wf}")
+                    release(wf)
+                    continue
+
+                if step.depends_on:
+                    step_input = {
+                        "trigger": trigger_data,
+                        "upstream": {dep: r.get("output") for dep, r in upstream.items()},
+                    }
+                else:
+                    step_input = trigger_data
+                running[asyncio.create_task(self.run_workflow(wf, step_input))] = wf
+
+            if not running:
+                continue
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                wf = running.pop(task)
+                try:
+                    output = task.result()
+                except Exception as e:
+                    logging.error(f"DAG run {run_id}: step {wf} failed: {e}")
+                    failed[wf] = str(e)
+                    await asyncio.to_thread(
+                        self.checkpoints.save, run_id, wf, {"status": STEP_FAILED, "error": str(e)}
+                    )
+                    continue
+                results[wf] = {"status": STEP_SUCCEEDED, "output": output}
+                await asyncio.to_thread(self.checkpoints.save, run_id, wf, results[wf])
+                logging.info(f"DAG run {run_id}: completed {wf}")
+                release(wf)
+
+        if failed:
+            raise DagExecutionError(run_id, failed, results)
+        return results
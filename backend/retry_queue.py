@@ -0,0 +1,279 @@
+# Daemon Retry Queue
+# Durable local queue for operations that failed because a dependency was briefly down
+
+import contextlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from google.api_core import exceptions as google_exceptions
+from google.auth import exceptions as auth_exceptions
+
+
+# --- Configuration ---
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BASE_DELAY = 1.0  # Seconds before the first retry (before jitter)
+DEFAULT_MAX_DELAY = 300.0  # Cap on the backoff delay
+DEFAULT_LEASE_SECONDS = 60.0  # How long a claimed message is hidden from other consumers
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Errors that mean "try again later" rather than "this request is wrong"
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.TooManyRequests,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.RetryError,
+    # GCS and token refresh go over `requests`, whose errors don't subclass the builtins below
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    auth_exceptions.TransportError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def is_transient(error: Exception) -> bool:
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_due ON pending (next_attempt_at);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class RetryQueue:
+    """SQLite-backed retry queue with exponential backoff and a dead-letter store.
+
+    Operations are registered by name with a handler that takes the JSON
+    payload. A failed operation is enqueued with `enqueue()`; `process_due()`
+    (or the background thread started by `start()`) runs every message whose
+    retry time has come. A failed retry is rescheduled with exponential
+    backoff and full jitter, so clients retrying after an outage don't all
+    hit the dependency at the same moment. After `max_attempts` failures the
+    message moves to the dead-letter table, where `replay()` can requeue it.
+
+    Handlers must be idempotent: a message can run again if the process dies
+    after the handler succeeds but before the message is deleted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # isolation_level=None: transactions are managed explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives a process crash; only an OS crash can lose the last commits
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def register(self, operation: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers[operation] = handler
+
+    def backoff(self, attempts: int) -> float:
+        """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2^attempts)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempts)))
+
+    def enqueue(self, operation: str, payload: Dict[str, Any], error: Optional[str] = None) -> int:
+        """Stores a failed operation for retry. Returns the message ID."""
+        if operation not in self._handlers:
+            raise ValueError(f"No handler registered for operation: {operation}")
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO pending (operation, payload, attempts, next_attempt_at, last_error, created_at) "
+                "VALUES (?, ?, 1, ?, ?, ?)",
+                (operation, json.dumps(payload), now + self.backoff(1), error, now),
+            )
+        logging.info(f"Queued {operation} for retry as message {cursor.lastrowid}")
+        return cursor.lastrowid
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Runs the block in one write transaction. Caller holds self._lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except Exception:
+            # Otherwise the connection stays inside the failed transaction and every later BEGIN fails
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _claim(self, now: float, limit: int) -> List[Tuple[int, str, str, int]]:
+        with self._lock, self._transaction():
+            rows = self._conn.execute(
+                "SELECT id, operation, payload, attempts FROM pending "
+                "WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            # Lease the rows so another worker process sharing this file skips them
+            self._conn.executemany(
+                "UPDATE pending SET next_attempt_at = ? WHERE id = ?",
+                [(now + self.lease_seconds, row[0]) for row in rows],
+            )
+        return rows
+
+    def process_due(self, now: Optional[float] = None, limit: int = 100) -> Dict[str, int]:
+        """Runs messages whose retry time has come.
+
+        Returns counts of messages that succeeded, were rescheduled and were dead-lettered.
+        """
+        now = time.time() if now is None else now
+        counts = {"succeeded": 0, "retried": 0, "dead_lettered": 0}
+
+        for message_id, operation, payload, attempts in self._claim(now, limit):
+            try:
+                self._handlers[operation](json.loads(payload))
+            except Exception as e:
+                attempts += 1
+                with self._lock:
+                    if attempts >= self.max_attempts:
+                        with self._transaction():
+                            self._conn.execute(
+                                "INSERT INTO dead_letters (id, operation, payload, attempts, last_error, created_at, failed_at) "
+                                "SELECT id, operation, payload, ?, ?, created_at, ? FROM pending WHERE id = ?",
+                                (attempts, str(e), time.time(), message_id),
+                            )
+                            self._conn.execute("DELETE FROM pending WHERE id = ?", (message_id,))
+                        counts["dead_lettered"] += 1
+                        logging.error(f"Message {message_id} ({operation}) dead-lettered after {attempts} attempts: {e}")
+                    else:
+                        self._conn.execute(
+                            "UPDATE pending SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                            (attempts, time.time() + self.backoff(attempts), str(e), message_id),
+                        )
+                        counts["retried"] += 1
+                continue
+
+            with self._lock:
+                self._conn.execute("DELETE FROM pending WHERE id = ?", (message_id,))
+            counts["succeeded"] += 1
+            logging.info(f"Retried {operation} message {message_id} successfully")
+
+        return counts
+
+    def dead_letters(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Lists dead letters, most recently failed first, without their payloads."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, operation, attempts, last_error, created_at, failed_at "
+                "FROM dead_letters ORDER BY failed_at DESC LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "operation": row[1],
+                "attempts": row[2],
+                "last_error": row[3],
+                "created_at": row[4],
+                "failed_at": row[5],
+            }
+            for row in rows
+        ]
+
+    def dead_letter(self, message_id: int) -> Optional[Dict[str, Any]]:
+        """Returns one dead letter including its payload, or None if there is none with that id."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, operation, payload, attempts, last_error, created_at, failed_at "
+                "FROM dead_letters WHERE id = ?",
+                (message_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "operation": row[1],
+            "payload": json.loads(row[2]),
+            "attempts": row[3],
+            "last_error": row[4],
+            "created_at": row[5],
+            "failed_at": row[6],
+        }
+
+    def replay(self, message_id: Optional[int] = None) -> int:
+        """Moves one dead letter (or all of them) back into the queue, due now.
+
+        Returns the number of messages requeued.
+        """
+        where, params = ("WHERE id = ?", (message_id,)) if message_id is not None else ("", ())
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "INSERT INTO pending (id, operation, payload, attempts, next_attempt_at, last_error, created_at) "
+                f"SELECT id, operation, payload, 0, ?, last_error, created_at FROM dead_letters {where}",
+                (time.time(), *params),
+            )
+            count = self._conn.execute(f"DELETE FROM dead_letters {where}", params).rowcount
+        logging.info(f"Replayed {count} dead-lettered messages")
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+            dead = self._conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+        return {"pending": pending, "dead_letters": dead}
+
+    def start(self, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """Starts a background thread that processes due messages."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(poll_interval):
+                try:
+                    self.process_due()
+                except Exception as e:
+                    logging.error(f"Retry queue processing failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="retry-queue", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._conn.close()
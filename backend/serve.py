@@ -0,0 +1,158 @@
+# Daemon Backend - Production Server
+# Pre-forking multi-process server with a shared cache tier
+#
+# Usage:
+#   python serve.py                   (or: DAEMON_ENV=production python main.py)
+#
+# Environment:
+#   PORT             Port to listen on (default 8080)
+#   WEB_CONCURRENCY  Worker processes (default: CPUs available to this container)
+#   GRACEFUL_TIMEOUT Seconds workers get to finish in-flight requests on shutdown (default 30)
+
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+# Workers are forked from this process; gRPC reads this setting when it is first imported,
+# which has to happen after this line (the app is imported below, in main()).
+os.environ.setdefault("GRPC_ENABLE_FORK_SUPPORT", "1")
+
+import uvicorn
+
+from cache import CACHE_SOCKET_ENV, SharedCacheServer
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use, honoring affinity and cgroup quotas.
+
+    os.cpu_count() reports the host's CPUs, which on Cloud Run or Kubernetes is
+    usually far more than the container is allowed to use.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def _run_worker(app, sock: socket.socket, graceful_timeout: int) -> None:
+    # Restore default handlers; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Drop the master's stderr handler; the app's startup hook sets up logging for this worker
+    logging.getLogger().handlers.clear()
+    config = uvicorn.Config(app, timeout_graceful_shutdown=graceful_timeout, log_level="info")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def _worker_process(app, sock: socket.socket, graceful_timeout: int) -> None:
+    """Runs a forked worker, exiting 0 on a clean return and 1 if it crashed."""
+    try:
+        _run_worker(app, sock, graceful_timeout)
+    except BaseException:
+        # Also covers SystemExit, which uvicorn raises when the app fails to start
+        logging.exception(f"Worker {os.getpid()} crashed")
+        os._exit(1)
+    os._exit(0)
+
+
+def main(app=None) -> None:
+    """Binds the port, preloads the app, forks workers and supervises them.
+
+    The app is imported before forking, so importing it must not start threads
+    or open connections (main.py defers those to its startup hook, which runs
+    in each worker).
+    """
+    logging.basicConfig(level=logging.INFO)
+    port = int(os.environ.get("PORT", 8080))
+    workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpus())
+    graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+
+    # The cache server lives in the master so every worker shares one copy
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="daemon-cache-"), "cache.sock")
+    cache_server = SharedCacheServer(cache_path)
+    cache_server.start()
+    os.environ[CACHE_SOCKET_ENV] = cache_path
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if app is None:
+        # Preload before forking so imports happen once and pages are shared copy-on-write
+        from main import app
+
+    children = {}
+    shutting_down = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _worker_process(app, sock, graceful_timeout)
+        children[pid] = time.monotonic()
+
+    def shutdown(signum, frame) -> None:
+        nonlocal shutting_down
+        shutting_down = True
+        logging.info(f"Received signal {signum}, stopping {len(children)} workers")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    logging.info(f"Starting {workers} workers on port {port}")
+    for _ in range(workers):
+        spawn()
+
+    deadline = None
+    while children:
+        if shutting_down and deadline is None:
+            deadline = time.monotonic() + graceful_timeout + 5
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        try:
+            # Poll so the shutdown deadline is enforced even if a worker hangs
+            pid, exit_status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.1)
+            continue
+        started = children.pop(pid, None)
+        if not shutting_down and started is not None:
+            logging.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(exit_status)}, restarting")
+            if time.monotonic() - started < 1:
+                time.sleep(1)  # Don't spin if workers crash on startup
+            spawn()
+
+    cache_server.shutdown()
+    cache_server.server_close()
+    os.remove(cache_path)
+    logging.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Tests for the cache tier."""
+
+import os
+import socket
+import time
+import pytest
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import LocalCache, SharedCacheClient, SharedCacheServer
+
+
+def test_local_cache_ttl_and_lru():
+    """Test that entries expire after their TTL and the oldest entry is evicted first."""
+    cache = LocalCache(max_entries=2)
+    cache.set("ns", "a", 1, ttl=60)
+    cache.set("ns", "b", 2, ttl=60)
+    cache.get("ns", "a")
+    cache.set("ns", "c", 3, ttl=60)
+
+    assert cache.get("ns", "a") == 1
+    assert cache.get("ns", "b") is None
+    assert cache.get("other", "a") is None
+
+    cache.set("ns", "short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("ns", "short", default="gone") == "gone"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_shared_cache_is_shared_across_processes(tmp_path):
+    """Test that a value set in one worker process is visible in another."""
+    path = str(tmp_path / "cache.sock")
+    server = SharedCacheServer(path)
+    server.start()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            SharedCacheClient(path).set("generation", "wf-1", {"code": "print(1)"}, ttl=60)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        client = SharedCacheClient(path)
+        assert client.get("generation", "wf-1") == {"code": "print(1)"}
+        client.delete("generation", "wf-1")
+        assert client.get("generation", "wf-1") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_shared_cache_client_degrades_to_miss(tmp_path):
+    """Test that an unreachable cache server behaves like an empty cache."""
+    client = SharedCacheClient(str(tmp_path / "missing.sock"))
+    client.set("ns", "a", 1, ttl=60)
+    assert client.get("ns", "a", default="miss") == "miss"
+
+
+def test_shared_cache_client_times_out_on_stalled_server(tmp_path):
+    """Test that a cache server that accepts but never answers degrades to a miss quickly."""
+    path = str(tmp_path / "stalled.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    try:
+        client = SharedCacheClient(path, timeout=0.1)
+        start = time.monotonic()
+        assert client.get("ns", "a", default="miss") == "miss"
+        assert time.monotonic() - start < 1
+    finally:
+        server.close()
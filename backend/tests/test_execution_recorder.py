@@ -0,0 +1,208 @@
+"""Tests for the batched execution recorder.
+
+These tests run against LocalExecutionStore and a mocked Firestore client,
+so no real Firestore documents are written.
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from execution_recorder import (
+    ExecutionRecorder,
+    FirestoreExecutionStore,
+    LocalExecutionStore,
+    export_columnar,
+    read_columnar,
+)
+
+
+def make_recorder(tmp_path, store=None, **kwargs):
+    kwargs.setdefault("flush_interval", 3600)
+    return ExecutionRecorder(store or LocalExecutionStore(), str(tmp_path / "spill.jsonl"), **kwargs)
+
+
+def test_flushes_in_batches_on_size(tmp_path):
+    """Test that records are written in one batch once flush_size is reached."""
+    store = LocalExecutionStore()
+    recorder = make_recorder(tmp_path, store, flush_size=3)
+
+    recorder.record({"workflow_id": "wf-1", "status": "success"})
+    recorder.record({"workflow_id": "wf-1", "status": "success"})
+    assert store.batches_written == 0
+
+    recorder.record({"workflow_id": "wf-1", "status": "failure"})
+    assert store.batches_written == 1
+    assert len(store.records) == 3
+    assert len(recorder) == 0
+
+
+def test_flushes_on_time_threshold(tmp_path):
+    """Test that a record arriving after flush_interval triggers a flush."""
+    store = LocalExecutionStore()
+    recorder = make_recorder(tmp_path, store, flush_size=100, flush_interval=0)
+
+    recorder.record({"workflow_id": "wf-1"})
+    assert store.batches_written == 1
+
+
+def test_failed_flush_spills_and_replays(tmp_path):
+    """Test that a failed flush spills to disk and a new recorder replays it."""
+    failing_store = MagicMock()
+    failing_store.write_batch.side_effect = Exception("Firestore unavailable")
+    recorder = make_recorder(tmp_path, failing_store, flush_size=2)
+
+    first = recorder.record({"workflow_id": "wf-1"})
+    second = recorder.record({"workflow_id": "wf-2"})
+    assert os.path.exists(tmp_path / "spill.jsonl")
+
+    store = LocalExecutionStore()
+    make_recorder(tmp_path, store)
+    assert set(store.records) == {first, second}
+    assert not os.path.exists(tmp_path / "spill.jsonl")
+
+
+def test_failed_replay_keeps_records(tmp_path):
+    """Test that records from a failed replay are kept and replayed with later spills."""
+    failing_store = MagicMock()
+    failing_store.write_batch.side_effect = Exception("Firestore unavailable")
+    recorder = make_recorder(tmp_path, failing_store, flush_size=1)
+    first = recorder.record({"workflow_id": "wf-1"})
+
+    make_recorder(tmp_path, failing_store)  # Replay fails; the records go back to spill.jsonl
+    second = recorder.record({"workflow_id": "wf-2"})
+
+    store = LocalExecutionStore()
+    make_recorder(tmp_path, store)
+    assert set(store.records) == {first, second}
+    assert os.listdir(tmp_path) == ["spill.jsonl.lock"]
+
+
+def test_replay_picks_up_claim_of_crashed_process(tmp_path):
+    """Test that records claimed by a process that died mid-replay are replayed by the next one."""
+    failing_store = MagicMock()
+    failing_store.write_batch.side_effect = Exception("Firestore unavailable")
+    recorder = make_recorder(tmp_path, failing_store, flush_size=1)
+    first = recorder.record({"workflow_id": "wf-1"})
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    os.rename(tmp_path / "spill.jsonl", tmp_path / f"spill.jsonl.replay.{pid}")
+    second = recorder.record({"workflow_id": "wf-2"})
+
+    store = LocalExecutionStore()
+    make_recorder(tmp_path, store)
+    assert set(store.records) == {first, second}
+    assert os.listdir(tmp_path) == ["spill.jsonl.lock"]
+
+
+def test_slow_replay_does_not_block_spills(tmp_path):
+    """Test that another recorder can spill while a replay is waiting on the store."""
+    failing_store = MagicMock()
+    failing_store.write_batch.side_effect = Exception("Firestore unavailable")
+    make_recorder(tmp_path, failing_store, flush_size=1).record({"workflow_id": "wf-1"})
+
+    entered, release = threading.Event(), threading.Event()
+
+    class BlockedStore(LocalExecutionStore):
+        def write_batch(self, records):
+            entered.set()
+            release.wait(5)
+            super().write_batch(records)
+
+    replay = threading.Thread(target=make_recorder, args=(tmp_path, BlockedStore()))
+    replay.start()
+    try:
+        assert entered.wait(5)
+        recorder = make_recorder(tmp_path, failing_store, flush_size=1, replay_on_start=False)
+        start = time.monotonic()
+        recorder.record({"workflow_id": "wf-2"})
+        assert time.monotonic() - start < 1
+        assert os.path.exists(tmp_path / "spill.jsonl")
+    finally:
+        release.set()
+        replay.join()
+
+
+class SlowStore(LocalExecutionStore):
+    """Keeps a replay in progress long enough for other workers to start theirs."""
+
+    def write_batch(self, records):
+        time.sleep(0.2)
+        super().write_batch(records)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_concurrent_replay_across_processes(tmp_path):
+    """Test that workers starting together on one spill file replay each record exactly once."""
+    failing_store = MagicMock()
+    failing_store.write_batch.side_effect = Exception("Firestore unavailable")
+    recorder = make_recorder(tmp_path, failing_store, flush_size=50)
+    for i in range(50):
+        recorder.record({"workflow_id": f"wf-{i}"})
+
+    results = tmp_path / "results"
+    results.mkdir()
+    start_read, start_write = os.pipe()
+    pids = []
+    for worker in range(8):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(start_write)
+                os.read(start_read, 1)  # Returns once the parent closes the pipe, so all workers start together
+                store = SlowStore()
+                make_recorder(tmp_path, store)
+                (results / str(worker)).write_text(str(len(store.records)))
+                os._exit(0)
+            except BaseException:
+                os._exit(1)
+        pids.append(pid)
+    os.close(start_read)
+    os.close(start_write)
+
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in pids)
+    assert sum(int(f.read_text()) for f in results.iterdir()) == 50
+
+
+def test_firestore_store_uses_batches():
+    """Test that FirestoreExecutionStore commits in chunks of at most 500 writes."""
+    mock_db = MagicMock()
+    store = FirestoreExecutionStore(mock_db)
+
+    store.write_batch([{"execution_id": f"ex-{i}"} for i in range(501)])
+
+    assert mock_db.batch.call_count == 2
+    assert mock_db.batch.return_value.commit.call_count == 2
+    assert mock_db.batch.return_value.set.call_count == 501
+    mock_db.collection.assert_called_with('executions')
+
+
+def test_export_columnar_roundtrip(tmp_path):
+    """Test that a columnar export of the local store reads back intact."""
+    store = LocalExecutionStore()
+    store.write_batch([
+        {"execution_id": "a", "status": "success", "duration_ms": 12},
+        {"execution_id": "b", "status": "failure", "error": "boom"},
+    ])
+    path = str(tmp_path / "executions.json.gz")
+
+    assert export_columnar(store.stream(), path) == 2
+
+    records = {r["execution_id"]: r for r in read_columnar(path)}
+    assert records["a"]["duration_ms"] == 12
+    assert records["a"]["error"] is None
+    assert records["b"]["error"] == "boom"
+
+
+def test_flush_size_cannot_exceed_buffer(tmp_path):
+    """Test that an impossible flush threshold is rejected."""
+    with pytest.raises(ValueError):
+        make_recorder(tmp_path, max_buffer=10, flush_size=20)
@@ -0,0 +1,138 @@
+"""Tests for GET /workflows and GET /workflows/{workflow_id} with mocked Firestore.
+
+These tests mock the Firestore client, so no real documents are read.
+"""
+
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app
+from cache import LocalCache
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """Gives each test an empty cache so cached metadata doesn't leak between tests."""
+    cache = LocalCache()
+    with patch('main.get_cache', return_value=cache):
+        yield cache
+
+
+def make_doc(workflow_id, minute, status="deployed"):
+    doc = MagicMock()
+    doc.id = workflow_id
+    doc.exists = True
+    doc.update_time = datetime(2025, 10, 25, 12, minute, tzinfo=timezone.utc)
+    doc.to_dict.return_value = {
+        'workflow_id': workflow_id,
+        'code_path': f"gs://bucket/{workflow_id}/main.py",
+        'webhook_url': f"https://example.test/trigger/{workflow_id}",
+        'created_at': datetime(2025, 10, 25, 12, minute, tzinfo=timezone.utc),
+        'status': status,
+    }
+    return doc
+
+
+def mock_query(mock_firestore, docs):
+    """Makes every chained query method return the same mock query."""
+    query = MagicMock()
+    for method in ('where', 'order_by', 'select', 'start_after', 'limit'):
+        getattr(query, method).return_value = query
+    query.stream.return_value = iter(docs)
+    mock_firestore.return_value.collection.return_value = query
+    return query
+
+
+def test_list_workflows_paginates_with_cursor():
+    """Test that a full page returns a cursor and the next request starts after it."""
+    with patch('main.firestore.Client') as mock_firestore:
+        query = mock_query(mock_firestore, [make_doc("wf-c", 3), make_doc("wf-b", 2), make_doc("wf-a", 1)])
+
+        response = client.get("/workflows", params={"limit": 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [w["workflow_id"] for w in data["workflows"]] == ["wf-c", "wf-b"]
+        assert data["next_cursor"]
+        query.limit.assert_called_once_with(3)
+
+        query = mock_query(mock_firestore, [make_doc("wf-a", 1)])
+        response = client.get("/workflows", params={"limit": 2, "cursor": data["next_cursor"]})
+
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
+        start_after = query.start_after.call_args[0][0]
+        assert start_after['__name__'] == "wf-b"
+        assert start_after['created_at'] == datetime(2025, 10, 25, 12, 2, tzinfo=timezone.utc)
+
+
+def test_list_workflows_filters_and_projection():
+    """Test that filters become Firestore where clauses and fields become a select."""
+    with patch('main.firestore.Client') as mock_firestore:
+        query = mock_query(mock_firestore, [make_doc("wf-a", 1)])
+
+        response = client.get("/workflows", params={
+            "status": "deployed",
+            "created_after": "2025-10-01T00:00:00Z",
+            "fields": "workflow_id,status",
+        })
+
+        assert response.status_code == 200
+        assert response.json()["workflows"] == [{"workflow_id": "wf-a", "status": "deployed"}]
+        assert query.where.call_count == 2
+        query.select.assert_called_once_with(['created_at', 'status', 'workflow_id'])
+
+
+def test_list_workflows_rejects_bad_input():
+    """Test unknown projection fields and malformed cursors."""
+    with patch('main.firestore.Client') as mock_firestore:
+        mock_query(mock_firestore, [])
+        assert client.get("/workflows", params={"fields": "secret"}).status_code == 400
+        assert client.get("/workflows", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/workflows", params={"limit": 1000}).status_code == 422
+
+
+def test_get_workflow_etag_and_304(fresh_cache):
+    """Test that a matching If-None-Match returns 304 with no body."""
+    with patch('main.firestore.Client') as mock_firestore:
+        doc_ref = mock_firestore.return_value.collection.return_value.document.return_value
+        doc_ref.get.return_value = make_doc("wf-a", 1)
+
+        response = client.get("/workflows/wf-a")
+        assert response.status_code == 200
+        assert response.json()["workflow_id"] == "wf-a"
+        etag = response.headers["ETag"]
+
+        response = client.get("/workflows/wf-a", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        # The poll was answered from the metadata cache
+        assert doc_ref.get.call_count == 1
+
+        # A redeploy invalidates the cached metadata
+        fresh_cache.delete("workflow_metadata", "wf-a")
+        doc_ref.get.return_value = make_doc("wf-a", 5)
+        response = client.get("/workflows/wf-a", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_get_workflow_not_found():
+    """Test 404 for a workflow that does not exist."""
+    with patch('main.firestore.Client') as mock_firestore:
+        doc = MagicMock()
+        doc.exists = False
+        mock_firestore.return_value.collection.return_value.document.return_value.get.return_value = doc
+
+        response = client.get("/workflows/missing")
+
+        assert response.status_code == 404
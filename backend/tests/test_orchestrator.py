@@ -0,0 +1,155 @@
+"""Tests for the DAG orchestrator.
+
+Workflow execution is replaced with a fake async runner and checkpoints
+are kept in a temporary directory, so no workflows are actually executed.
+"""
+
+import asyncio
+import pytest
+from pydantic import ValidationError
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from orchestrator import (
+    DagExecutionError,
+    DagOrchestrator,
+    LocalCheckpointStore,
+    WorkflowDAG,
+)
+
+
+class FakeRunner:
+    """Records calls and tracks how many steps run at once."""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, workflow_id, trigger_data):
+        self.calls.append((workflow_id, trigger_data))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if workflow_id in self.fail:
+            raise RuntimeError(f"{workflow_id} exploded")
+        return {"from": workflow_id, "status": "ok"}
+
+
+def diamond():
+    return WorkflowDAG(steps=[
+        {"workflow_id": "fetch"},
+        {"workflow_id": "enrich", "depends_on": ["fetch"], "estimated_duration": 5},
+        {"workflow_id": "notify", "depends_on": ["fetch"]},
+        {"workflow_id": "report", "depends_on": ["enrich", "notify"]},
+    ])
+
+
+def test_runs_branches_concurrently_and_passes_outputs(tmp_path):
+    """Test that independent branches overlap and downstream steps see upstream outputs."""
+    runner = FakeRunner()
+    orchestrator = DagOrchestrator(runner, LocalCheckpointStore(str(tmp_path)))
+
+    results = asyncio.run(orchestrator.run(diamond(), "run-1", {"event": "push"}))
+
+    assert all(r["status"] == "succeeded" for r in results.values())
+    assert runner.max_active == 2
+    trigger_data = dict(runner.calls)
+    assert trigger_data["fetch"] == {"event": "push"}
+    assert trigger_data["report"]["trigger"] == {"event": "push"}
+    assert set(trigger_data["report"]["upstream"]) == {"enrich", "notify"}
+
+
+def test_critical_path_runs_first(tmp_path):
+    """Test that with one slot the step on the longest chain is scheduled first."""
+    runner = FakeRunner()
+    orchestrator = DagOrchestrator(runner, LocalCheckpointStore(str(tmp_path)), max_concurrency=1)
+
+    asyncio.run(orchestrator.run(diamond(), "run-1", {}))
+
+    order = [wf for wf, _ in runner.calls]
+    assert order.index("enrich") < order.index("notify")
+
+
+def test_retry_resumes_from_checkpoint(tmp_path):
+    """Test that a retried run skips steps that already succeeded."""
+    store = LocalCheckpointStore(str(tmp_path))
+
+    with pytest.raises(DagExecutionError) as exc_info:
+        asyncio.run(DagOrchestrator(FakeRunner(fail={"notify"}), store).run(diamond(), "run-1", {}))
+    assert set(exc_info.value.failed) == {"notify"}
+    assert "report" not in exc_info.value.results
+
+    runner = FakeRunner()
+    results = asyncio.run(DagOrchestrator(runner, store).run(diamond(), "run-1", {}))
+
+    assert [wf for wf, _ in runner.calls] == ["notify", "report"]
+    assert results["report"]["status"] == "succeeded"
+
+
+def test_resume_ignores_steps_no_longer_in_dag(tmp_path):
+    """Test that a checkpoint for a step removed from the DAG does not break resuming."""
+    store = LocalCheckpointStore(str(tmp_path))
+    store.save("run-2", "gone", {"status": "succeeded", "output": {}})
+    runner = FakeRunner()
+
+    results = asyncio.run(DagOrchestrator(runner, store).run(diamond(), "run-2", {}))
+
+    assert len(runner.calls) == 4
+    assert "gone" not in results
+
+
+def test_condition_skips_branch(tmp_path):
+    """Test that an unmet condition skips the step and everything downstream of it."""
+    dag = WorkflowDAG(steps=[
+        {"workflow_id": "check"},
+        {"workflow_id": "alert", "depends_on": ["check"],
+         "condition": {"source": "check", "key": "status", "equals": "failed"}},
+        {"workflow_id": "escalate", "depends_on": ["alert"]},
+    ])
+    runner = FakeRunner()
+
+    results = asyncio.run(DagOrchestrator(runner, LocalCheckpointStore(str(tmp_path))).run(dag, "run-1", {}))
+
+    assert [wf for wf, _ in runner.calls] == ["check"]
+    assert results["alert"]["status"] == "skipped"
+    assert results["escalate"]["status"] == "skipped"
+
+
+def test_join_after_conditional_branches(tmp_path):
+    """Test that a none_failed join runs when only one of its conditional branches ran."""
+    dag = WorkflowDAG(steps=[
+        {"workflow_id": "check"},
+        {"workflow_id": "on_fail", "depends_on": ["check"],
+         "condition": {"source": "check", "key": "status", "equals": "failed"}},
+        {"workflow_id": "on_ok", "depends_on": ["check"],
+         "condition": {"source": "check", "key": "status", "equals": "ok"}},
+        {"workflow_id": "report", "depends_on": ["on_fail", "on_ok"], "trigger_rule": "none_failed"},
+        {"workflow_id": "audit", "depends_on": ["on_fail", "on_ok"]},
+    ])
+    runner = FakeRunner()
+
+    results = asyncio.run(DagOrchestrator(runner, LocalCheckpointStore(str(tmp_path))).run(dag, "run-1", {}))
+
+    assert sorted(wf for wf, _ in runner.calls) == ["check", "on_ok", "report"]
+    assert results["on_fail"]["status"] == "skipped"
+    assert results["report"]["status"] == "succeeded"
+    assert results["audit"]["status"] == "skipped"  # all_success still skips on any skipped upstream
+    report_input = dict(runner.calls)["report"]
+    assert report_input["upstream"] == {"on_fail": None, "on_ok": {"from": "on_ok", "status": "ok"}}
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    """Test that invalid DAG definitions fail validation."""
+    with pytest.raises(ValidationError):
+        WorkflowDAG(steps=[
+            {"workflow_id": "a", "depends_on": ["b"]},
+            {"workflow_id": "b", "depends_on": ["a"]},
+        ])
+    with pytest.raises(ValidationError):
+        WorkflowDAG(steps=[{"workflow_id": "a", "depends_on": ["missing"]}])
@@ -0,0 +1,183 @@
+"""Tests for the durable retry queue and its use by /deploy-workflow and /trigger.
+
+The queue runs against a temporary SQLite file; GCS, Firestore and Pub/Sub
+are mocked.
+"""
+
+import pytest
+import requests
+import sqlite3
+from fastapi.testclient import TestClient
+from google.api_core import exceptions as google_exceptions
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from main import app
+from retry_queue import RetryQueue
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = RetryQueue(str(tmp_path / "retry.db"), max_attempts=3, base_delay=0.01, max_delay=0.01)
+    yield q
+    q.close()
+
+
+def test_retries_until_success(queue):
+    """Test that a failing message is rescheduled and then succeeds."""
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise ConnectionError("still down")
+
+    queue.register("op", handler)
+    queue.enqueue("op", {"n": 1})
+
+    far_future = 1e12
+    assert queue.process_due(now=far_future) == {"succeeded": 0, "retried": 1, "dead_lettered": 0}
+    assert queue.process_due(now=far_future) == {"succeeded": 1, "retried": 0, "dead_lettered": 0}
+    assert calls == [{"n": 1}, {"n": 1}]
+    assert queue.stats() == {"pending": 0, "dead_letters": 0}
+
+
+def test_dead_letter_and_replay(queue):
+    """Test that a message moves to dead letters after max_attempts and can be replayed."""
+    handler = MagicMock(side_effect=ConnectionError("down"))
+    queue.register("op", handler)
+    message_id = queue.enqueue("op", {"n": 1})
+
+    queue.process_due(now=1e12)
+    result = queue.process_due(now=1e12)
+
+    assert result["dead_lettered"] == 1
+    dead = queue.dead_letters()
+    assert [d["id"] for d in dead] == [message_id]
+    assert dead[0]["attempts"] == 3
+    assert "down" in dead[0]["last_error"]
+
+    handler.side_effect = None
+    assert queue.replay(message_id) == 1
+    assert queue.process_due(now=1e12)["succeeded"] == 1
+    assert queue.stats() == {"pending": 0, "dead_letters": 0}
+
+
+def test_failed_dead_letter_move_rolls_back(queue):
+    """Test that a dead-letter move that fails midway leaves the queue usable and the message pending."""
+    queue.register("op", MagicMock(side_effect=ConnectionError("down")))
+    message_id = queue.enqueue("op", {"n": 1})
+    queue.process_due(now=1e12)
+    # A leftover dead letter with the same id makes the move's INSERT fail
+    queue._conn.execute(
+        "INSERT INTO dead_letters (id, operation, payload, attempts, created_at, failed_at) VALUES (?, 'op', '{}', 1, 0, 0)",
+        (message_id,),
+    )
+
+    with pytest.raises(sqlite3.IntegrityError):
+        queue.process_due(now=1e12)
+
+    assert queue.stats() == {"pending": 1, "dead_letters": 1}
+    queue.register("op", MagicMock())
+    assert queue.process_due(now=2e12)["succeeded"] == 1  # After the lease from the failed run expires
+
+
+def test_retry_queue_endpoints_list_dead_letters_without_payloads(queue):
+    """Test that GET /retry-queue lists a bounded page of dead letters and payloads are fetched per id."""
+    queue.register("op", MagicMock(side_effect=ConnectionError("down")))
+    ids = [queue.enqueue("op", {"n": n}) for n in range(3)]
+    queue.process_due(now=1e12)
+    queue.process_due(now=2e12)
+
+    with patch('main.get_retry_queue', return_value=queue):
+        status_response = client.get("/retry-queue", params={"limit": 2})
+        detail_response = client.get(f"/retry-queue/dead-letters/{ids[0]}")
+        missing_response = client.get("/retry-queue/dead-letters/999")
+
+    body = status_response.json()
+    assert body["dead_letters"] == 3
+    assert len(body["dead_letter_messages"]) == 2
+    assert all("payload" not in message for message in body["dead_letter_messages"])
+    assert detail_response.json()["payload"] == {"n": 0}
+    assert missing_response.status_code == 404
+
+
+def test_messages_survive_restart(tmp_path):
+    """Test that queued messages are still there when the queue is reopened."""
+    path = str(tmp_path / "retry.db")
+    first = RetryQueue(path)
+    first.register("op", MagicMock())
+    first.enqueue("op", {"n": 1})
+    first.close()
+
+    second = RetryQueue(path)
+    handler = MagicMock()
+    second.register("op", handler)
+    assert second.process_due(now=1e12)["succeeded"] == 1
+    handler.assert_called_once_with({"n": 1})
+    second.close()
+
+
+def test_backoff_is_bounded(queue):
+    """Test that jittered backoff never exceeds max_delay."""
+    assert all(0 <= queue.backoff(attempt) <= 0.01 for attempt in range(1, 20))
+
+
+def test_deploy_transient_error_is_queued(queue):
+    """Test that a transient GCS outage returns 202 and queues the deployment."""
+    with patch('main.storage.Client') as mock_storage, \
+         patch('main.get_retry_queue', return_value=queue):
+        mock_storage.return_value.bucket.side_effect = google_exceptions.ServiceUnavailable("GCS down")
+        queue.register("deploy_workflow", MagicMock())
+
+        response = client.post(
+            "/deploy-workflow",
+            json={"workflow_id": "test-workflow-123", "generated_code": "print('hi')"}
+        )
+
+        assert response.status_code == 202
+        assert "queued" in response.json()["message"]
+        assert "test-workflow-123" in response.json()["webhook_url"]
+        assert queue.stats()["pending"] == 1
+
+
+def test_deploy_gcs_connection_drop_is_queued(queue):
+    """Test that a dropped GCS connection (a requests error, not a google.api_core one) is queued."""
+    with patch('main.storage.Client') as mock_storage, \
+         patch('main.get_retry_queue', return_value=queue):
+        blob = mock_storage.return_value.bucket.return_value.blob.return_value
+        blob.upload_from_string.side_effect = requests.exceptions.ConnectionError("Connection aborted.")
+        queue.register("deploy_workflow", MagicMock())
+
+        response = client.post(
+            "/deploy-workflow",
+            json={"workflow_id": "test-workflow-123", "generated_code": "print('hi')"}
+        )
+
+        assert response.status_code == 202
+        assert queue.stats()["pending"] == 1
+
+
+def test_trigger_transient_error_is_queued(queue):
+    """Test that a transient Pub/Sub outage queues the raw body for retry."""
+    with patch('main.pubsub_v1.PublisherClient') as mock_pubsub, \
+         patch.object(main, '_publisher', None), \
+         patch('main.get_retry_queue', return_value=queue):
+        mock_pubsub.return_value.publish.side_effect = google_exceptions.ServiceUnavailable("Pub/Sub down")
+        handler = MagicMock()
+        queue.register("trigger_workflow", handler)
+
+        response = client.post("/trigger/test-workflow-123", content=b'{"a": 1}')
+
+        assert response.status_code == 202
+        assert response.json()["message_id"].startswith("retry-")
+        queue.process_due(now=1e12)
+        payload = handler.call_args[0][0]
+        assert payload["workflow_id"] == "test-workflow-123"
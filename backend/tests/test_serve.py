@@ -0,0 +1,92 @@
+"""Tests for the production server and per-worker setup after fork."""
+
+import logging
+import os
+import select
+import time
+import pytest
+import sys
+from unittest.mock import patch
+
+import google.cloud.logging
+from google.auth.credentials import AnonymousCredentials
+from google.cloud.logging_v2.handlers import CloudLoggingHandler
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import serve
+from serve import available_cpus
+
+
+def test_available_cpus_is_positive():
+    """Test that worker count detection always yields at least one worker."""
+    assert available_cpus() >= 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+@pytest.mark.parametrize("crash, expected_status", [(False, 0), (True, 1)])
+def test_worker_exit_status_reports_crashes(crash, expected_status):
+    """Test that a worker that crashes exits non-zero, and one that returns cleanly exits 0."""
+    def run_worker(app, sock, graceful_timeout):
+        if crash:
+            raise RuntimeError("startup failed")
+
+    pid = os.fork()
+    if pid == 0:
+        logging.disable(logging.CRITICAL)  # Keep the expected traceback out of the test output
+        with patch.object(serve, "_run_worker", run_worker):
+            serve._worker_process(None, None, 0)
+        os._exit(2)  # Unreachable unless _worker_process returned
+
+    _, exit_status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(exit_status) == expected_status
+
+
+class PipeLoggingAPI:
+    """Stands in for the Cloud Logging API; each shipped entry is written to a pipe."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def write_entries(self, entries, **kwargs):
+        for entry in entries:
+            os.write(self.fd, f"{entry.get('textPayload', entry)}\n".encode())
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_worker_logging_ships_entries_after_fork():
+    """Test that a forked worker's Cloud Logging handler actually delivers entries."""
+    import main
+
+    # Importing the app in the master must not install the handler (its thread would not survive the fork)
+    assert not any(isinstance(h, CloudLoggingHandler) for h in logging.getLogger().handlers)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            cloud = google.cloud.logging.Client(project="test", credentials=AnonymousCredentials(), _use_grpc=False)
+            cloud._logging_api = PipeLoggingAPI(write_fd)
+            with patch.object(main.google.cloud.logging, "Client", return_value=cloud):
+                main.setup_logging()  # What the worker's startup hook runs
+            logging.getLogger("workflow").warning("hello from worker")
+            cloud.flush_handlers()
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+
+    os.close(write_fd)
+    received = b""
+    deadline = time.monotonic() + 10
+    while b"hello from worker" not in received and time.monotonic() < deadline:
+        ready, _, _ = select.select([read_fd], [], [], 0.1)
+        if ready:
+            received += os.read(read_fd, 4096)
+    os.close(read_fd)
+    if os.waitpid(pid, os.WNOHANG)[0] == 0:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+
+    assert b"hello from worker" in received
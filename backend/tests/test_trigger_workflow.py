@@ -0,0 +1,90 @@
+"""Tests for /trigger/{workflow_id} endpoint with mocked Pub/Sub.
+
+These tests mock the Pub/Sub publisher so no real messages are published.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_publisher():
+    """Makes each test create its publisher through the patched PublisherClient."""
+    with patch.object(main, '_publisher', None):
+        yield
+
+
+def mock_publisher(mock_pubsub, message_id="msg-1"):
+    publisher = MagicMock()
+    publisher.topic_path.return_value = "projects/test/topics/daemon-workflow-triggers"
+    publisher.publish.return_value.result.return_value = message_id
+    mock_pubsub.return_value = publisher
+    return publisher
+
+
+def test_trigger_forwards_raw_bytes():
+    """Test that the body is published byte-for-byte, without re-serialization."""
+    body = b'{"text":  "hello",\n "n": 1}'
+    with patch('main.pubsub_v1.PublisherClient') as mock_pubsub:
+        publisher = mock_publisher(mock_pubsub)
+
+        response = client.post(
+            "/trigger/test-workflow-123",
+            content=body,
+            headers={"content-type": "application/json"}
+        )
+
+        assert response.status_code == 202
+        assert response.json()["message_id"] == "msg-1"
+
+        args, kwargs = publisher.publish.call_args
+        assert args[1] == body
+        assert kwargs["workflow_id"] == "test-workflow-123"
+        assert kwargs["content_type"] == "application/json"
+
+
+def test_trigger_rejects_oversized_payload():
+    """Test that payloads above the size cap are rejected with 413 and never published."""
+    with patch('main.pubsub_v1.PublisherClient') as mock_pubsub, \
+         patch.object(main, 'MAX_TRIGGER_PAYLOAD_BYTES', 16):
+        publisher = mock_publisher(mock_pubsub)
+
+        response = client.post("/trigger/test-workflow-123", content=b"x" * 17)
+
+        assert response.status_code == 413
+        publisher.publish.assert_not_called()
+
+
+def test_trigger_publish_error():
+    """Test error handling when Pub/Sub publish fails."""
+    with patch('main.pubsub_v1.PublisherClient') as mock_pubsub:
+        publisher = mock_publisher(mock_pubsub)
+        publisher.publish.side_effect = Exception("Pub/Sub unavailable")
+
+        response = client.post("/trigger/test-workflow-123", content=b"{}")
+
+        assert response.status_code == 500
+        assert "Failed to trigger workflow" in response.json()["detail"]
+
+
+def test_publisher_reused_across_triggers():
+    """Test that one publisher client serves every trigger on a worker."""
+    with patch('main.pubsub_v1.PublisherClient') as mock_pubsub:
+        publisher = mock_publisher(mock_pubsub)
+
+        client.post("/trigger/test-workflow-123", content=b"{}")
+        client.post("/trigger/test-workflow-123", content=b"{}")
+
+        mock_pubsub.assert_called_once()
+        assert publisher.publish.call_count == 2
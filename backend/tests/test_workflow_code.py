@@ -0,0 +1,111 @@
+"""Tests for the content-hashed workflow code endpoints with mocked GCS and Firestore."""
+
+import hashlib
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import app
+from cache import LocalCache
+
+client = TestClient(app)
+
+CODE = b"print('Hello from workflow')\n"
+CODE_SHA256 = hashlib.sha256(CODE).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    cache = LocalCache()
+    with patch('main.get_cache', return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def mocks():
+    with patch('main.storage.Client') as mock_storage, \
+         patch('main.firestore.Client') as mock_firestore:
+        doc = MagicMock()
+        doc.exists = True
+        doc.update_time = datetime(2025, 10, 25, tzinfo=timezone.utc)
+        doc.to_dict.return_value = {'workflow_id': 'wf-1', 'code_sha256': CODE_SHA256}
+        mock_firestore.return_value.collection.return_value.document.return_value.get.return_value = doc
+        blob = mock_storage.return_value.bucket.return_value.blob.return_value
+        blob.download_as_bytes.return_value = CODE
+        yield blob
+
+
+def test_code_served_with_content_hash_etag(mocks):
+    """Test that code is returned with its SHA-256 as the ETag."""
+    response = client.get("/workflows/wf-1/code")
+
+    assert response.status_code == 200
+    assert response.content == CODE
+    assert response.headers["ETag"] == f'"{CODE_SHA256}"'
+
+
+def test_revalidation_skips_gcs(mocks):
+    """Test that a matching If-None-Match returns 304 without downloading from GCS."""
+    response = client.get("/workflows/wf-1/code", headers={"If-None-Match": f'"{CODE_SHA256}"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    mocks.download_as_bytes.assert_not_called()
+
+
+def test_code_cached_by_hash(mocks):
+    """Test that repeated fetches are served from the cache tier."""
+    client.get("/workflows/wf-1/code")
+    client.get("/workflows/wf-1/code")
+
+    mocks.download_as_bytes.assert_called_once()
+
+
+def test_legacy_workflow_gets_content_hash_backfilled():
+    """Test that code for a workflow deployed without code_sha256 is hashed and the hash stored."""
+    with patch('main.storage.Client') as mock_storage, \
+         patch('main.firestore.Client') as mock_firestore, \
+         patch('main.firestore.transactional', lambda func: func):
+        doc = MagicMock()
+        doc.exists = True
+        doc.update_time = datetime(2025, 10, 25, tzinfo=timezone.utc)
+        doc.to_dict.return_value = {'workflow_id': 'wf-1'}
+        workflow_doc = mock_firestore.return_value.collection.return_value.document.return_value
+        workflow_doc.get.return_value = doc
+        mock_storage.return_value.bucket.return_value.blob.return_value.download_as_bytes.return_value = CODE
+
+        response = client.get("/workflows/wf-1/code")
+
+        assert response.headers["ETag"] == f'"{CODE_SHA256}"'
+        transaction = mock_firestore.return_value.transaction.return_value
+        transaction.update.assert_called_once_with(workflow_doc, {'code_sha256': CODE_SHA256})
+
+
+def test_code_by_hash_is_immutable(mocks):
+    """Test the hash-keyed URL: cacheable forever for the current hash, 404 otherwise."""
+    response = client.get(f"/workflows/wf-1/code/{CODE_SHA256}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+
+    response = client.get(f"/workflows/wf-1/code/{'0' * 64}")
+    assert response.status_code == 404
+
+
+def test_deploy_records_content_hash():
+    """Test that deploy stores the code's SHA-256 in the workflow metadata."""
+    with patch('main.storage.Client'), patch('main.firestore.Client') as mock_firestore:
+        mock_doc = mock_firestore.return_value.collection.return_value.document.return_value
+
+        response = client.post(
+            "/deploy-workflow",
+            json={"workflow_id": "wf-1", "generated_code": CODE.decode()}
+        )
+
+        assert response.status_code == 201
+        assert mock_doc.set.call_args[0][0]['code_sha256'] == CODE_SHA256
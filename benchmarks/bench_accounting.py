@@ -0,0 +1,82 @@
+"""Benchmark: overhead of per-execution resource accounting and profiling.
+
+Usage:
+    python benchmarks/bench_accounting.py
+
+Measures:
+1. Cost of entering/exiting ExecutionAccounting around an empty execution
+2. Extra cost per SDK call from the track_sdk_call wrapper
+3. Extra process CPU time and wall time of a CPU-bound run with the sampling
+   profiler enabled (median of 40 alternating runs each)
+"""
+
+import sys
+import os
+import statistics
+import time
+import timeit
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from daemon_sdk.accounting import ExecutionAccounting, track_sdk_call
+
+
+def noop():
+    return None
+
+
+tracked_noop = track_sdk_call(noop)
+
+
+def busy(n=3_000_000):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def per_execution_overhead(runs=20_000):
+    def run():
+        with ExecutionAccounting("wf-bench") as accounting:
+            pass
+        accounting.to_record()
+    return min(timeit.repeat(run, number=runs, repeat=5)) / runs
+
+
+def per_call_overhead(calls=200_000):
+    with ExecutionAccounting("wf-bench"):
+        tracked = min(timeit.repeat(tracked_noop, number=calls, repeat=5)) / calls
+    plain = min(timeit.repeat(noop, number=calls, repeat=5)) / calls
+    return tracked - plain
+
+
+def profiler_overhead(repeat=40):
+    """Median process CPU and wall time of a CPU-bound run, without and with profiling.
+
+    Plain and profiled runs alternate so drift in machine load hits both alike.
+    """
+    timings = {False: ([], []), True: ([], [])}
+    for _ in range(repeat):
+        for profile in (False, True):
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            with ExecutionAccounting("wf-bench", profile=profile):
+                busy()
+            timings[profile][0].append(time.process_time() - cpu_start)
+            timings[profile][1].append(time.perf_counter() - wall_start)
+    return {
+        profile: (statistics.median(cpu), statistics.median(wall))
+        for profile, (cpu, wall) in timings.items()
+    }
+
+
+if __name__ == "__main__":
+    print(f"Accounting per execution: {per_execution_overhead() * 1e6:.1f} µs")
+    print(f"Accounting per SDK call:  {per_call_overhead() * 1e6:.2f} µs")
+    medians = profiler_overhead()
+    for label, i in (("CPU", 0), ("wall", 1)):
+        plain, profiled = medians[False][i], medians[True][i]
+        print(
+            f"Profiler (5 ms interval), median {label}: {plain * 1000:.1f} ms -> {profiled * 1000:.1f} ms "
+            f"({(profiled / plain - 1) * 100:+.1f}%)"
+        )
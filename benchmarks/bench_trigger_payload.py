@@ -0,0 +1,85 @@
+"""Benchmark: memory and parse overhead of the trigger path.
+
+Usage:
+    python benchmarks/bench_trigger_payload.py
+
+Compares two ways of carrying a webhook body from the backend to the
+workflow, for a GitHub-push-sized payload (~1 MB):
+
+- eager: parse in the backend, re-serialize for Pub/Sub, parse again in the worker
+- raw:   forward the bytes unchanged and parse once, lazily, in the worker
+
+Reports the memory held per in-flight trigger while it is queued (bytes vs
+parsed dict) and end-to-end parse time per trigger.
+"""
+
+import json
+import sys
+import os
+import timeit
+import tracemalloc
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from daemon_sdk import trigger
+from daemon_sdk.trigger import TriggerPayload
+
+
+def make_body(commits=4000):
+    return json.dumps({
+        "ref": "refs/heads/main",
+        "repository": {"full_name": "acme/widgets", "private": False},
+        "commits": [
+            {
+                "id": f"{i:040x}",
+                "message": "Fix flaky test in the payment retry path " * 2,
+                "author": {"name": "Dev", "email": "dev@example.com"},
+                "added": [], "removed": [], "modified": [f"src/module_{i}.py"],
+            }
+            for i in range(commits)
+        ],
+    }).encode()
+
+
+def held_bytes(build, count=20):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / count
+
+
+def eager(body):
+    queued = json.dumps(json.loads(body)).encode()
+    return json.loads(queued)
+
+
+def raw(body):
+    return TriggerPayload(body).data()
+
+
+def raw_stdlib(body):
+    saved = trigger.orjson
+    trigger.orjson = None
+    try:
+        return TriggerPayload(body).data()
+    finally:
+        trigger.orjson = saved
+
+
+def best(fn, body, number=20):
+    return min(timeit.repeat(lambda: fn(body), number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+    body = make_body()
+    print(f"Payload size: {len(body) / 1024:.0f} KiB")
+    print(f"Held per queued trigger, parsed dict: {held_bytes(lambda: json.loads(body)) / 1024:.0f} KiB")
+    print(f"Held per queued trigger, raw bytes:   {held_bytes(lambda: TriggerPayload(bytes(bytearray(body)))) / 1024:.0f} KiB")
+    print(f"Parse per trigger, eager (parse+dump+parse): {best(eager, body) * 1000:.2f} ms")
+    print(f"Parse per trigger, raw + lazy (stdlib json): {best(raw_stdlib, body) * 1000:.2f} ms")
+    if trigger.orjson is not None:
+        print(f"Parse per trigger, raw + lazy (orjson):      {best(raw, body) * 1000:.2f} ms")
@@ -0,0 +1,253 @@
+"""Daemon SDK - Execution Resource Accounting
+
+Measures where an execution's time goes so a slow workflow can be traced to
+CPU-bound user code, slow secret fetches or slow Slack calls.
+
+For every run the Execution Worker wraps workflow code in ExecutionAccounting,
+which records wall time, CPU time, peak RSS and the time spent inside each
+SDK function. The result of `to_record()` is stored under `resources` in the
+run's execution record (see backend/execution_recorder.py).
+
+On Linux the kernel's RSS high-water mark is reset when a run starts
+(/proc/self/clear_refs), so `peak_rss_kb` is the peak reached during that
+run. Elsewhere only the process-wide ru_maxrss is available, so the record
+carries `rss_growth_kb` instead: how far the run raised the process's peak.
+
+An opt-in sampling profiler can be enabled per workflow or for a random
+fraction of runs. It samples the executing thread's stack on a background
+thread and produces collapsed-stack output ("frame;frame;frame count" lines)
+that flamegraph.pl and speedscope read directly.
+
+Overhead (benchmarks/bench_accounting.py, Python 3.11, x86-64 Linux, 1 vCPU):
+- Accounting without profiling: ~35 µs per execution, most of it resetting
+  and reading the RSS high-water mark in /proc, plus ~1 µs per SDK call.
+  This is always on.
+- Profiling at the default 5 ms interval: +3% to +5% process CPU and wall
+  time on a CPU-bound run (medians of 40 alternating runs, three benchmark
+  runs), mostly GIL hand-offs to the sampler thread. This is why profiling
+  is opt-in rather than always on.
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+
+# --- Configuration ---
+DEFAULT_SAMPLE_INTERVAL = 0.005  # Seconds between profiler samples
+MAX_PROFILE_STACKS = 200  # Keeps the stored profile well inside Firestore's 1 MiB document limit
+
+
+def should_profile(
+    workflow_id: str,
+    enabled_workflows: Optional[Iterable[str]] = None,
+    sample_rate: Optional[float] = None,
+) -> bool:
+    """Decides whether to profile this run.
+
+    Defaults come from DAEMON_PROFILE_WORKFLOWS (comma-separated workflow_ids)
+    and DAEMON_PROFILE_SAMPLE_RATE (fraction of all runs, 0.0-1.0).
+    """
+    if enabled_workflows is None:
+        enabled_workflows = [wf for wf in os.environ.get("DAEMON_PROFILE_WORKFLOWS", "").split(",") if wf]
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("DAEMON_PROFILE_SAMPLE_RATE", "0"))
+    return workflow_id in set(enabled_workflows) or random.random() < sample_rate
+
+
+def _max_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the process's RSS high-water mark (VmHWM) to its current RSS. Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _vm_hwm_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# --- Sampling Profiler ---
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="daemon-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self, max_stacks: int = MAX_PROFILE_STACKS) -> str:
+        """Returns the hottest stacks in collapsed-stack format."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common(max_stacks))
+
+
+# --- Per-Execution Accounting ---
+
+class ExecutionAccounting:
+    """Context manager that measures one workflow execution.
+
+    Example (Execution Worker):
+        ```python
+        with ExecutionAccounting(workflow_id, profile=should_profile(workflow_id)) as accounting:
+            run_workflow_code()
+        record["resources"] = accounting.to_record()
+        ```
+    """
+
+    def __init__(self, workflow_id: str, profile: bool = False, sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.workflow_id = workflow_id
+        self.profile = profile
+        self.sample_interval = sample_interval
+        self.sdk_calls: Dict[str, Dict[str, float]] = {}
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_kb: Optional[int] = None
+        self.rss_growth_kb = 0
+        self.profiler: Optional[SamplingProfiler] = None
+        self._token = None
+
+    def __enter__(self) -> "ExecutionAccounting":
+        self._token = _current_accounting.set(self)
+        # The reset is process-wide: with concurrent executions in one worker,
+        # each run's peak covers everything since the most recent start
+        self._peak_reset = _reset_peak_rss()
+        self._max_rss_start = _max_rss_kb()
+        if self.profile:
+            self.profiler = SamplingProfiler(threading.get_ident(), self.sample_interval)
+            self.profiler.start()
+        self._wall_start = time.perf_counter()
+        # Thread CPU time, so concurrent executions in one worker don't inflate each other
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        if self.profiler is not None:
+            self.profiler.stop()
+        self.peak_rss_kb = _vm_hwm_kb() if self._peak_reset else None
+        self.rss_growth_kb = _max_rss_kb() - self._max_rss_start
+        _current_accounting.reset(self._token)
+
+    def add_sdk_call(self, name: str, seconds: float) -> None:
+        stats = self.sdk_calls.setdefault(name, {"count": 0, "seconds": 0.0})
+        stats["count"] += 1
+        stats["seconds"] += seconds
+
+    def to_record(self) -> Dict[str, Any]:
+        """Returns the measurements in the shape stored on execution records."""
+        record: Dict[str, Any] = {
+            "wall_ms": round(self.wall_seconds * 1000, 3),
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            "sdk_calls": {
+                name: {"count": int(stats["count"]), "ms": round(stats["seconds"] * 1000, 3)}
+                for name, stats in self.sdk_calls.items()
+            },
+        }
+        if self.peak_rss_kb is not None:
+            record["peak_rss_kb"] = self.peak_rss_kb
+        else:
+            record["rss_growth_kb"] = self.rss_growth_kb
+        if self.profiler is not None:
+            record["profile"] = {
+                "format": "collapsed",
+                "interval_ms": self.sample_interval * 1000,
+                "stacks": self.profiler.collapsed(),
+            }
+        return record
+
+
+_current_accounting: contextvars.ContextVar[Optional[ExecutionAccounting]] = contextvars.ContextVar(
+    "daemon_execution_accounting", default=None
+)
+
+
+def track_sdk_call(func: Callable) -> Callable:
+    """Decorator that charges time spent in an SDK function to the current execution.
+
+    If the function returns a generator (e.g. iter_trigger_items), the time
+    spent producing each item is charged too, as one call recorded when the
+    iteration ends. Time the workflow spends between items is not.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        accounting = _current_accounting.get()
+        if accounting is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            accounting.add_sdk_call(func.__name__, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        if inspect.isgenerator(result):
+            return _charge_iteration(accounting, func.__name__, result, elapsed)
+        accounting.add_sdk_call(func.__name__, elapsed)
+        return result
+
+    return wrapper
+
+
+def _charge_iteration(accounting: "ExecutionAccounting", name: str, items: Iterator[Any], seconds: float) -> Iterator[Any]:
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - start
+            yield item
+    finally:
+        items.close()
+        accounting.add_sdk_call(name, seconds)
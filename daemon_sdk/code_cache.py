@@ -0,0 +1,243 @@
+"""Daemon SDK - Workflow Code Cache
+
+Keeps Execution Workers from downloading a workflow's main.py on every
+trigger or cold start.
+
+Code is stored on local disk under its SHA-256 content hash, so a version is
+downloaded at most once per worker (rollbacks included), and the decoded
+source of recently used versions is kept in memory so a hot workflow never
+touches disk. Both tiers are bounded: the least recently used workflows are
+dropped beyond `max_workflows`, and the oldest versions no workflow points
+at are deleted from disk beyond `max_files`.
+
+The backend serves code from GET /workflows/{workflow_id}/code with the
+content hash as its ETag. When a cached copy is older than
+`revalidate_after`, the worker sends a conditional request and normally gets
+304 with no body. Requests go through the SDK's shared connection pool
+(http_pool.py), so they reuse connections and time out after
+DAEMON_HTTP_TIMEOUT instead of hanging on a stalled backend.
+
+Workers can also call `watch()` to hear about deploys as they happen. Every
+deploy writes a new `code_sha256` to the workflow's Firestore document; the
+cache listens to the documents of the workflows it holds (never the whole
+collection, which would stream every workflow to every worker) and marks a
+workflow stale when its hash changes. With a watch in place,
+`revalidate_after` can be long and hot workflows transfer no bytes at all
+between deploys.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .http_pool import HttpPool, get_pool
+
+
+DEFAULT_REVALIDATE_AFTER = 30.0  # Seconds before a cached copy is checked with the backend again
+DEFAULT_MAX_WORKFLOWS = 256  # Workflows (and decoded versions) held in memory and watched
+DEFAULT_MAX_FILES = 1024  # Code versions kept on disk
+
+
+class WorkflowCodeCache:
+    """On-disk, content-addressed cache of workflow code."""
+
+    def __init__(
+        self,
+        base_url: str,
+        cache_dir: str,
+        revalidate_after: float = DEFAULT_REVALIDATE_AFTER,
+        max_workflows: int = DEFAULT_MAX_WORKFLOWS,
+        max_files: int = DEFAULT_MAX_FILES,
+        pool: Optional[HttpPool] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.revalidate_after = revalidate_after
+        self.max_workflows = max_workflows
+        self.max_files = max_files
+        self.pool = pool
+        os.makedirs(cache_dir, exist_ok=True)
+        # workflow_id -> (code_sha256, time of last confirmation), least recently used first
+        self._current: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # code_sha256 -> decoded source
+        self._code: "OrderedDict[str, str]" = OrderedDict()
+        self._watched = None  # Firestore collection reference once watch() is called
+        self._watches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "downloads": 0, "bytes_downloaded": 0}
+
+    def _path(self, code_sha256: str) -> str:
+        return os.path.join(self.cache_dir, f"{code_sha256}.py")
+
+    def _read(self, code_sha256: str) -> Optional[str]:
+        """Returns a version's source, or None if it is not on disk."""
+        with self._lock:
+            code = self._code.get(code_sha256)
+            if code is not None:
+                self._code.move_to_end(code_sha256)
+                return code
+        try:
+            with open(self._path(code_sha256), "rb") as f:
+                code = f.read().decode("utf-8")
+        except FileNotFoundError:
+            return None  # Pruned, possibly by another worker sharing cache_dir
+        self._keep(code_sha256, code)
+        return code
+
+    def _keep(self, code_sha256: str, code: str) -> None:
+        with self._lock:
+            self._code[code_sha256] = code
+            while len(self._code) > self.max_workflows:
+                self._code.popitem(last=False)
+
+    def _store(self, code: bytes, code_sha256: str) -> None:
+        if hashlib.sha256(code).hexdigest() != code_sha256:
+            raise ValueError(f"Downloaded code does not match its content hash {code_sha256}")
+        path = self._path(code_sha256)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(code)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self) -> None:
+        """Deletes the oldest versions no cached workflow points at, down to max_files."""
+        names = [name for name in os.listdir(self.cache_dir) if name.endswith(".py")]
+        if len(names) <= self.max_files:
+            return
+        with self._lock:
+            in_use = {f"{code_sha256}.py" for code_sha256, _ in self._current.values()}
+        aged = []
+        for name in names:
+            if name in in_use:
+                continue
+            try:
+                aged.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name))
+            except FileNotFoundError:
+                pass
+        for _, name in sorted(aged)[:len(names) - self.max_files]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def get_code(self, workflow_id: str) -> str:
+        """Returns the workflow's current code, downloading only when it changed."""
+        with self._lock:
+            entry = self._current.get(workflow_id)
+        if entry and time.monotonic() - entry[1] < self.revalidate_after:
+            code = self._read(entry[0])
+            if code is not None:
+                self.stats["hits"] += 1
+                self._remember(workflow_id, entry[0])
+                return code
+
+        pool = self.pool or get_pool()
+        url = f"{self.base_url}/workflows/{workflow_id}/code"
+        if entry:
+            response = pool.get(url, headers={"If-None-Match": f'"{entry[0]}"'})
+            if response.status_code == 304:
+                code = self._read(entry[0])
+                if code is not None:
+                    self.stats["revalidated"] += 1
+                    self._remember(workflow_id, entry[0], confirmed=True)
+                    return code
+                response = pool.get(url)
+        else:
+            response = pool.get(url)
+        response.raise_for_status()
+
+        raw = response.content
+        code_sha256 = response.headers["ETag"].strip('"')
+        self.stats["downloads"] += 1
+        self.stats["bytes_downloaded"] += len(raw)
+        self._store(raw, code_sha256)
+        code = raw.decode("utf-8")
+        self._keep(code_sha256, code)
+        self._remember(workflow_id, code_sha256, confirmed=True)
+        logging.info(f"Cached code for {workflow_id} ({code_sha256[:12]}, {len(raw)} bytes)")
+        return code
+
+    def _remember(self, workflow_id: str, code_sha256: str, confirmed: bool = False) -> None:
+        """Records the workflow's current version, evicting and watching as needed."""
+        evicted = []
+        with self._lock:
+            previous = self._current.get(workflow_id)
+            checked_at = time.monotonic() if confirmed or previous is None else previous[1]
+            self._current[workflow_id] = (code_sha256, checked_at)
+            self._current.move_to_end(workflow_id)
+            while len(self._current) > self.max_workflows:
+                old_id, _ = self._current.popitem(last=False)
+                evicted.append(self._watches.pop(old_id, None))
+            subscribe = self._watched is not None and workflow_id not in self._watches
+            if subscribe:
+                self._watches[workflow_id] = None  # Claimed, so concurrent calls subscribe once
+        for watch in evicted:
+            if watch is not None:
+                watch.unsubscribe()
+        if subscribe:
+            self._subscribe(workflow_id)
+
+    def invalidate(self, workflow_id: str, code_sha256: Optional[str] = None) -> None:
+        """Handles a deploy notification.
+
+        If the new version is already on disk (e.g. a rollback), it becomes
+        current immediately; otherwise the next get_code() revalidates with
+        the backend and downloads it.
+        """
+        with self._lock:
+            entry = self._current.get(workflow_id)
+            if code_sha256 and (code_sha256 in self._code or os.path.exists(self._path(code_sha256))):
+                self._current[workflow_id] = (code_sha256, time.monotonic())
+            elif entry is not None:
+                self._current[workflow_id] = (entry[0], float("-inf"))
+
+    def watch(self, db, collection: str = "workflows") -> None:
+        """Subscribes to deploy notifications pushed by Firestore.
+
+        Listens to the document of every workflow this cache holds, now and
+        as new ones are fetched; evicted workflows are unsubscribed. Call
+        `unwatch()` to stop.
+        """
+        with self._lock:
+            self._watched = db.collection(collection)
+            workflow_ids = [workflow_id for workflow_id in self._current if workflow_id not in self._watches]
+            for workflow_id in workflow_ids:
+                self._watches[workflow_id] = None
+        for workflow_id in workflow_ids:
+            self._subscribe(workflow_id)
+
+    def unwatch(self) -> None:
+        with self._lock:
+            watches = list(self._watches.values())
+            self._watches.clear()
+            self._watched = None
+        for watch in watches:
+            if watch is not None:
+                watch.unsubscribe()
+
+    def _subscribe(self, workflow_id: str) -> None:
+        def on_snapshot(docs, changes, read_time):
+            data = (docs[0].to_dict() if docs and docs[0].exists else None) or {}
+            with self._lock:
+                current = self._current.get(workflow_id)
+            if current is not None and current[0] != data.get("code_sha256"):
+                self.invalidate(workflow_id, data.get("code_sha256"))
+
+        with self._lock:
+            watched = self._watched
+        if watched is None:
+            return
+        watch = watched.document(workflow_id).on_snapshot(on_snapshot)
+        with self._lock:
+            claimed = workflow_id in self._watches and self._watches[workflow_id] is None
+            if claimed:
+                self._watches[workflow_id] = watch
+        if not claimed:
+            watch.unsubscribe()  # Evicted or unwatched while subscribing
@@ -5,19 +5,36 @@ These function signatures provide the contract between the Backend API and
 the AI-generated code that will eventually run on Cloud Run.
 
 For MVP, we support three core operations:
-1. Getting incoming webhook data
+1. Getting incoming webhook data (parsed lazily; see trigger.py)
 2. Retrieving secrets (e.g., Slack tokens)
 3. Posting messages to Slack
+
+Workflows can also keep small pieces of state between runs (dedup keys,
+counters, cursors) with get_state(), set_state(), increment_state() and
+delete_state(). See state.py for how state is cached and committed.
+
+Outbound HTTP calls (post_slack_message, http_request) share one keep-alive
+connection pool per worker, so warm executions skip DNS, TCP and TLS setup.
+See http_pool.py.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
+
+from .accounting import track_sdk_call
+from .http_pool import get_pool
+from .state import current_state
+from .trigger import current_trigger
+
+
+SLACK_POST_MESSAGE_URL = "https://slack.com/api/chat.postMessage"
 
 
+@track_sdk_call
 def get_trigger_data() -> Dict[str, Any]:
     """Gets the incoming webhook payload.
     
-    This function will be implemented by the Execution Worker to read
-    the webhook data from the request context or environment.
+    The Execution Worker receives the webhook body as raw bytes; it is
+    parsed on the first call and the same object is returned after that.
     
     Returns:
         Dict containing the webhook payload data
@@ -29,10 +46,32 @@ def get_trigger_data() -> Dict[str, Any]:
         message = data.get('text')
         ```
     """
-    # Implementation will read from environment/context
-    pass
+    return current_trigger().data()
+
+
+@track_sdk_call
+def iter_trigger_items(key: Optional[str] = None) -> Iterator[Any]:
+    """Iterates over a large array in the webhook payload one item at a time.
+    
+    Use this instead of get_trigger_data() for very large payloads, so the
+    whole array never has to be held in memory as Python objects.
+    
+    Args:
+        key: Top-level key holding the array, or None if the payload itself is an array
+        
+    Returns:
+        Iterator over the array elements
+        
+    Example:
+        ```python
+        for commit in iter_trigger_items('commits'):
+            print(commit['id'])
+        ```
+    """
+    return current_trigger().iter_items(key)
 
 
+@track_sdk_call
 def get_secret(secret_name: str) -> str:
     """Gets a secret value (e.g., Slack token).
     
@@ -54,11 +93,12 @@ def get_secret(secret_name: str) -> str:
     pass
 
 
+@track_sdk_call
 def post_slack_message(token: str, channel: str, text: str) -> Dict[str, Any]:
     """Helper to post a message to Slack.
     
-    This function will be implemented by the Execution Worker to use
-    the 'requests' library to post to Slack's API.
+    Calls Slack's chat.postMessage API over the worker's shared
+    connection pool.
     
     Args:
         token: Slack bot token
@@ -74,5 +114,130 @@ def post_slack_message(token: str, channel: str, text: str) -> Dict[str, Any]:
         response = post_slack_message(token, '#general', 'Hello from Daemon!')
         ```
     """
-    # Implementation uses 'requests' library
-    pass
+    response = get_pool().post(
+        SLACK_POST_MESSAGE_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        json={"channel": channel, "text": text},
+    )
+    return response.json()
+
+
+@track_sdk_call
+def http_request(method: str, url: str, **kwargs) -> Dict[str, Any]:
+    """Makes an HTTP request to any external API.
+    
+    Connections are pooled per host and reused across executions, so
+    repeated calls to the same API are much faster than the first one.
+    
+    Args:
+        method: HTTP method, e.g. 'GET' or 'POST'
+        url: Full URL to call
+        **kwargs: Passed to httpx: json, data, headers, params, timeout
+        
+    Returns:
+        Dict with 'status_code', 'headers' and 'body' (parsed JSON if the
+        response is JSON, otherwise text)
+        
+    Example:
+        ```python
+        result = http_request('POST', 'https://api.example.com/items', json={'name': 'x'})
+        if result['status_code'] == 201:
+            print(result['body']['id'])
+        ```
+    """
+    response = get_pool().request(method, url, **kwargs)
+    is_json = response.headers.get("content-type", "").startswith("application/json")
+    return {
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "body": response.json() if is_json and response.content else response.text,
+    }
+
+
+@track_sdk_call
+def get_state(key: str, default: Any = None) -> Any:
+    """Gets a value this workflow stored in an earlier run.
+    
+    State is loaded once when the execution starts, so reads are served
+    from memory. Changes made by other runs after that point are not seen;
+    if they touch a key this run read, the commit at the end of the run
+    fails with StateConflictError instead of silently overwriting them.
+    
+    Args:
+        key: Name of the state entry
+        default: Value returned if the key has never been set
+        
+    Returns:
+        The stored value, or `default`
+        
+    Example:
+        ```python
+        cursor = get_state('last_seen_id', default=0)
+        ```
+    """
+    return current_state().get(key, default)
+
+
+@track_sdk_call
+def set_state(key: str, value: Any) -> None:
+    """Stores a value for later runs of this workflow.
+    
+    The write is buffered and committed together with all other state
+    changes when the execution finishes successfully. A workflow's state is
+    loaded in full at the start of every run, so keep it small: store a
+    cursor rather than one key per event.
+    
+    Args:
+        key: Name of the state entry
+        value: Any JSON-compatible value except None
+        
+    Example:
+        ```python
+        data = get_trigger_data()
+        if data['id'] > get_state('last_seen_id', default=0):
+            set_state('last_seen_id', data['id'])
+            post_slack_message(token, '#alerts', data['text'])
+        ```
+    """
+    current_state().set(key, value)
+
+
+@track_sdk_call
+def increment_state(key: str, amount: float = 1) -> float:
+    """Adds `amount` to a numeric state entry and returns the new value.
+    
+    Increments from concurrent runs are merged rather than treated as a
+    conflict, so counters stay exact. The returned value reflects this
+    run's view and may not include increments still in flight elsewhere.
+    
+    Args:
+        key: Name of the counter
+        amount: Amount to add (may be negative)
+        
+    Returns:
+        The counter value after this increment
+        
+    Example:
+        ```python
+        runs = increment_state('run_count')
+        ```
+    """
+    return current_state().increment(key, amount)
+
+
+@track_sdk_call
+def delete_state(key: str) -> bool:
+    """Removes a state entry.
+    
+    Args:
+        key: Name of the state entry
+        
+    Returns:
+        True if the key existed
+        
+    Example:
+        ```python
+        delete_state('pending_batch')
+        ```
+    """
+    return current_state().delete(key)
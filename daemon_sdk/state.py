@@ -0,0 +1,244 @@
+"""Daemon SDK - Workflow State
+
+Persistent key/value state for workflows that need to remember something
+between runs (dedup keys, counters, cursors).
+
+Each execution works against an ExecutionState: the workflow's whole state
+document is read once when the execution starts, every get/set/increment/
+delete after that is served from memory, and all changes are written back in
+one batched commit when the execution ends. Concurrent runs of the same
+workflow are caught with optimistic version checks: every key carries a
+version, and the commit fails with StateConflictError if a key this execution
+read or overwrote was changed by someone else in the meantime. Increments
+are applied as deltas and never conflict, so counters stay correct under
+concurrency.
+
+Versions come from a per-workflow commit counter, so a key that is deleted
+and later recreated never gets a version an earlier run could have seen.
+That lets deletes drop the key entirely instead of leaving a tombstone.
+
+All of a workflow's state lives in one Firestore document (1 MiB limit) that
+is read at the start of every run, so state should stay small: keep a cursor
+or a counter rather than one key per event, and delete keys that are done.
+"""
+
+import contextvars
+import copy
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+# Versioned snapshot of a workflow's state: key -> (value, version)
+Entries = Dict[str, Tuple[Any, int]]
+# Snapshot plus the number of the last commit: (seq, entries)
+Snapshot = Tuple[int, Entries]
+
+_MISSING = object()
+
+
+class StateConflictError(Exception):
+    """Raised when another execution changed state this execution depended on."""
+
+    def __init__(self, namespace: str, keys):
+        super().__init__(f"Concurrent update to state of {namespace}: {sorted(keys)}")
+        self.namespace = namespace
+        self.keys = set(keys)
+
+
+# --- Backing Stores ---
+
+class LocalStateStore:
+    """In-memory backing store for tests and local runs."""
+
+    def __init__(self):
+        self._data: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.commits = 0
+
+    def load(self, namespace: str) -> Entries:
+        with self._lock:
+            self.reads += 1
+            return copy.deepcopy(self._data.get(namespace, (0, {}))[1])
+
+    def commit(self, namespace: str, expected: Dict[str, int], writes: Dict[str, Any], deltas: Dict[str, float]) -> int:
+        with self._lock:
+            seq, entries = self._data.get(namespace, (0, {}))
+            _apply(namespace, entries, expected, writes, deltas, seq + 1)
+            self._data[namespace] = (seq + 1, entries)
+            self.commits += 1
+            return seq + 1
+
+
+class FirestoreStateStore:
+    """Keeps each workflow's state in one Firestore document.
+
+    Document layout: `{"seq": n, "entries": {key: {"value": ..., "version": n}}}`,
+    where `seq` is the number of the last commit. Commits run in a Firestore
+    transaction so the version check and the write are atomic.
+    """
+
+    def __init__(self, db, collection: str = "workflow_state"):
+        self.db = db
+        self.collection = collection
+
+    def _ref(self, namespace: str):
+        return self.db.collection(self.collection).document(namespace)
+
+    @staticmethod
+    def _snapshot(snapshot) -> Snapshot:
+        if not snapshot.exists:
+            return 0, {}
+        data = snapshot.to_dict() or {}
+        raw = data.get("entries", {})
+        # Documents written before `seq` existed: no version handed out so far may be reused
+        seq = data.get("seq", max((entry.get("version", 0) for entry in raw.values()), default=0))
+        entries = {
+            key: (entry.get("value"), entry.get("version", 0))
+            for key, entry in raw.items()
+            if entry.get("value") is not None  # Drops tombstones left by older versions
+        }
+        return seq, entries
+
+    def load(self, namespace: str) -> Entries:
+        return self._snapshot(self._ref(namespace).get())[1]
+
+    def commit(self, namespace: str, expected: Dict[str, int], writes: Dict[str, Any], deltas: Dict[str, float]) -> int:
+        from google.cloud import firestore
+
+        ref = self._ref(namespace)
+
+        @firestore.transactional
+        def _commit(transaction):
+            seq, entries = self._snapshot(ref.get(transaction=transaction))
+            _apply(namespace, entries, expected, writes, deltas, seq + 1)
+            transaction.set(ref, {
+                "seq": seq + 1,
+                "entries": {key: {"value": value, "version": version} for key, (value, version) in entries.items()},
+            })
+            return seq + 1
+
+        return _commit(self.db.transaction())
+
+
+def _apply(
+    namespace: str,
+    entries: Entries,
+    expected: Dict[str, int],
+    writes: Dict[str, Any],
+    deltas: Dict[str, float],
+    version: int,
+) -> None:
+    """Checks versions and applies commit number `version` to `entries` in place."""
+    conflicts = [key for key, seen in expected.items() if entries.get(key, (None, 0))[1] != seen]
+    if conflicts:
+        raise StateConflictError(namespace, conflicts)
+
+    for key, value in writes.items():
+        if value is _MISSING:
+            entries.pop(key, None)
+        else:
+            entries[key] = (value, version)
+    for key, amount in deltas.items():
+        entries[key] = ((entries.get(key, (0, 0))[0] or 0) + amount, version)
+
+
+# --- Per-Execution Write-Back Cache ---
+
+class ExecutionState:
+    """Write-back cache over one workflow's state for a single execution."""
+
+    def __init__(self, store, namespace: str):
+        self.store = store
+        self.namespace = namespace
+        self._entries = store.load(namespace)
+        self._expected: Dict[str, int] = {}
+        self._writes: Dict[str, Any] = {}
+        self._deltas: Dict[str, float] = {}
+
+    def _version(self, key: str) -> int:
+        return self._entries.get(key, (None, 0))[1]
+
+    def _current(self, key: str) -> Any:
+        if key in self._writes:
+            value = self._writes[key]
+            return None if value is _MISSING else value
+        return self._entries.get(key, (None, 0))[0]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._expected.setdefault(key, self._version(key))
+        value = self._current(key)
+        if key in self._deltas:
+            value = (value or 0) + self._deltas[key]
+        return default if value is None else copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        if value is None:
+            raise ValueError("State values cannot be None; use delete() instead")
+        self._expected.setdefault(key, self._version(key))
+        self._deltas.pop(key, None)
+        self._writes[key] = copy.deepcopy(value)
+
+    def increment(self, key: str, amount: float = 1) -> float:
+        if key in self._writes or key in self._expected:
+            # Already read or overwritten in this run, so fold into the version-checked write
+            value = (self.get(key) or 0) + amount
+            self.set(key, value)
+            return value
+        self._deltas[key] = self._deltas.get(key, 0) + amount
+        return (self._entries.get(key, (None, 0))[0] or 0) + self._deltas[key]
+
+    def delete(self, key: str) -> bool:
+        existed = self._current(key) is not None or key in self._deltas
+        self._expected.setdefault(key, self._version(key))
+        self._deltas.pop(key, None)
+        self._writes[key] = _MISSING
+        return existed
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._writes or self._deltas)
+
+    def commit(self) -> None:
+        """Writes all changes back in one batched commit (no-op if nothing changed)."""
+        if not self.dirty:
+            return
+        version = self.store.commit(self.namespace, dict(self._expected), dict(self._writes), dict(self._deltas))
+        # Mirror the commit locally instead of paying for a second read
+        _apply(self.namespace, self._entries, {}, self._writes, self._deltas, version)
+        self._writes.clear()
+        self._deltas.clear()
+        self._expected.clear()
+
+
+# --- Execution Binding ---
+
+_current_state: contextvars.ContextVar[Optional[ExecutionState]] = contextvars.ContextVar(
+    "daemon_execution_state", default=None
+)
+
+
+def begin_execution(store, workflow_id: str) -> ExecutionState:
+    """Called by the Execution Worker before running workflow code."""
+    state = ExecutionState(store, workflow_id)
+    _current_state.set(state)
+    return state
+
+
+def end_execution(commit: bool = True) -> None:
+    """Called by the Execution Worker after workflow code finishes.
+
+    Pass commit=False when the workflow raised, so its partial changes are
+    discarded rather than persisted.
+    """
+    state = _current_state.get()
+    _current_state.set(None)
+    if state is not None and commit:
+        state.commit()
+
+
+def current_state() -> ExecutionState:
+    state = _current_state.get()
+    if state is None:
+        raise RuntimeError("Workflow state is only available while a workflow execution is running")
+    return state
@@ -0,0 +1,103 @@
+"""Tests for per-execution resource accounting and the sampling profiler."""
+
+import time
+import pytest
+import sys
+import os
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from daemon_sdk import sdk
+from daemon_sdk.accounting import ExecutionAccounting, _reset_peak_rss, should_profile, track_sdk_call
+from daemon_sdk.state import LocalStateStore, begin_execution, end_execution
+
+
+@track_sdk_call
+def slow_call():
+    time.sleep(0.02)
+
+
+@track_sdk_call
+def slow_items():
+    for i in range(3):
+        time.sleep(0.01)
+        yield i
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_records_wall_cpu_rss_and_sdk_calls():
+    """Test that an execution reports its timings and per-SDK-call breakdown."""
+    begin_execution(LocalStateStore(), "wf-1")
+    with ExecutionAccounting("wf-1") as accounting:
+        slow_call()
+        sdk.increment_state("runs")
+        spin(0.02)
+    end_execution()
+
+    record = accounting.to_record()
+    assert record["wall_ms"] >= 40
+    assert record["cpu_ms"] >= 15
+    assert record.get("peak_rss_kb", 1) > 0
+    assert record.get("rss_growth_kb", 0) >= 0
+    assert record["sdk_calls"]["slow_call"]["count"] == 1
+    assert record["sdk_calls"]["slow_call"]["ms"] >= 20
+    assert record["sdk_calls"]["increment_state"]["count"] == 1
+    assert "profile" not in record
+
+
+@pytest.mark.skipif(not _reset_peak_rss(), reason="needs /proc/self/clear_refs")
+def test_peak_rss_is_per_run():
+    """Test that a run's peak RSS is not inflated by an earlier, larger run in the same process."""
+    with ExecutionAccounting("wf-big") as big:
+        data = b"x" * (64 << 20)
+        del data
+    with ExecutionAccounting("wf-small") as small:
+        pass
+
+    assert big.to_record()["peak_rss_kb"] - small.to_record()["peak_rss_kb"] > 32 << 10
+
+
+def test_generator_sdk_calls_charge_iteration():
+    """Test that time spent producing items is charged, but time in the loop body is not."""
+    with ExecutionAccounting("wf-1") as accounting:
+        for _ in slow_items():
+            time.sleep(0.02)
+
+    stats = accounting.to_record()["sdk_calls"]["slow_items"]
+    assert stats["count"] == 1
+    assert 30 <= stats["ms"] < 60
+
+
+def test_sdk_calls_outside_execution_are_not_tracked():
+    """Test that the wrapper is a pass-through with no active execution."""
+    with ExecutionAccounting("wf-1") as accounting:
+        pass
+    slow_call()
+    assert accounting.sdk_calls == {}
+
+
+def test_profiler_produces_collapsed_stacks():
+    """Test that profiling yields 'frame;frame count' lines naming the hot function."""
+    with ExecutionAccounting("wf-1", profile=True, sample_interval=0.001) as accounting:
+        spin(0.1)
+
+    profile = accounting.to_record()["profile"]
+    assert profile["format"] == "collapsed"
+    lines = profile["stacks"].splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("spin" in line for line in lines)
+
+
+def test_should_profile_by_workflow_and_rate():
+    """Test opt-in selection by workflow_id and by sampled fraction."""
+    assert should_profile("wf-1", enabled_workflows=["wf-1"], sample_rate=0)
+    assert not should_profile("wf-2", enabled_workflows=["wf-1"], sample_rate=0)
+    assert should_profile("wf-2", enabled_workflows=[], sample_rate=1)
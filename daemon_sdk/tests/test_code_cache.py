@@ -0,0 +1,155 @@
+"""Tests for the worker-side workflow code cache.
+
+A local HTTP server stands in for the backend's /workflows/{id}/code endpoint.
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+import httpx
+import pytest
+import sys
+import os
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from daemon_sdk.code_cache import WorkflowCodeCache
+from daemon_sdk.http_pool import HttpPool
+
+
+class FakeBackend(BaseHTTPRequestHandler):
+    code = b"print('v1')\n"
+    requests = []
+    stall = 0.0
+
+    def do_GET(self):
+        time.sleep(self.stall)
+        code = self.code
+        etag = f'"{hashlib.sha256(code).hexdigest()}"'
+        FakeBackend.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(code)))
+        self.end_headers()
+        self.wfile.write(code)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def backend():
+    FakeBackend.code = b"print('v1')\n"
+    FakeBackend.requests = []
+    FakeBackend.stall = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBackend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_hot_workflow_transfers_nothing(backend, tmp_path):
+    """Test that repeated reads within the revalidation window make no requests."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), revalidate_after=60)
+
+    assert cache.get_code("wf-1") == "print('v1')\n"
+    assert cache.get_code("wf-1") == "print('v1')\n"
+
+    assert len(FakeBackend.requests) == 1
+    assert cache.stats["hits"] == 1
+    assert cache.stats["bytes_downloaded"] == len(FakeBackend.code)
+
+
+def test_revalidation_gets_304(backend, tmp_path):
+    """Test that a stale copy is revalidated with If-None-Match and not re-downloaded."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), revalidate_after=0)
+
+    cache.get_code("wf-1")
+    assert cache.get_code("wf-1") == "print('v1')\n"
+
+    assert FakeBackend.requests[1] is not None
+    assert cache.stats["revalidated"] == 1
+    assert cache.stats["downloads"] == 1
+
+
+def test_deploy_notification_invalidates(backend, tmp_path):
+    """Test that a Firestore change with a new hash forces a fresh download."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), revalidate_after=3600)
+    db = MagicMock()
+    cache.watch(db)
+
+    cache.get_code("wf-1")
+    db.collection.return_value.document.assert_called_once_with("wf-1")
+    on_snapshot = db.collection.return_value.document.return_value.on_snapshot.call_args[0][0]
+
+    FakeBackend.code = b"print('v2')\n"
+    snapshot = MagicMock()
+    snapshot.to_dict.return_value = {"code_sha256": hashlib.sha256(FakeBackend.code).hexdigest()}
+    on_snapshot([snapshot], [], None)
+
+    assert cache.get_code("wf-1") == "print('v2')\n"
+    assert cache.stats["downloads"] == 2
+
+
+def test_rollback_uses_disk_copy(backend, tmp_path):
+    """Test that switching back to a version already on disk needs no request."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), revalidate_after=3600)
+    v1_sha = hashlib.sha256(FakeBackend.code).hexdigest()
+    cache.get_code("wf-1")
+
+    cache.invalidate("wf-1", "0" * 64)
+    cache.invalidate("wf-1", v1_sha)
+
+    assert cache.get_code("wf-1") == "print('v1')\n"
+    assert len(FakeBackend.requests) == 1
+
+
+def test_watch_follows_evictions(backend, tmp_path):
+    """Test that only cached workflows are watched and evicted ones are unsubscribed."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), max_workflows=1)
+    db = MagicMock()
+    watches = {}
+    db.collection.return_value.document.side_effect = lambda workflow_id: watches.setdefault(workflow_id, MagicMock())
+    cache.watch(db)
+
+    cache.get_code("wf-1")
+    cache.get_code("wf-2")
+
+    assert set(watches) == {"wf-1", "wf-2"}
+    watches["wf-1"].on_snapshot.return_value.unsubscribe.assert_called_once()
+    watches["wf-2"].on_snapshot.return_value.unsubscribe.assert_not_called()
+
+
+def test_unused_versions_pruned_from_disk(backend, tmp_path):
+    """Test that old versions no workflow points at are deleted beyond max_files."""
+    cache = WorkflowCodeCache(backend, str(tmp_path), revalidate_after=0, max_files=2)
+    shas = []
+    for version in range(3):
+        FakeBackend.code = f"print({version})\n".encode()
+        shas.append(hashlib.sha256(FakeBackend.code).hexdigest())
+        cache.get_code("wf-1")
+        time.sleep(0.01)  # Distinct mtimes
+
+    on_disk = {name[:-3] for name in os.listdir(tmp_path) if name.endswith(".py")}
+    assert on_disk == {shas[1], shas[2]}
+
+
+def test_stalled_backend_times_out(backend, tmp_path):
+    """Test that a backend that never answers raises instead of hanging the worker."""
+    FakeBackend.stall = 1.0
+    pool = HttpPool(timeout=0.2)
+    cache = WorkflowCodeCache(backend, str(tmp_path), pool=pool)
+    try:
+        with pytest.raises(httpx.TimeoutException):
+            cache.get_code("wf-1")
+    finally:
+        pool.close()
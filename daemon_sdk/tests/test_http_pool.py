@@ -0,0 +1,104 @@
+"""Tests for the shared HTTP connection pool.
+
+A local keep-alive HTTP/1.1 server stands in for external APIs.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+import sys
+import os
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from daemon_sdk import http_pool
+from daemon_sdk.http_pool import HttpPool, get_pool
+
+
+class KeepAliveServer(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    KeepAliveServer.delay = 0.0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveServer)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connection_reused(server):
+    """Test that the first request opens a connection and later ones reuse it."""
+    pool = HttpPool()
+    try:
+        for _ in range(3):
+            assert pool.get(f"{server}/ping").json() == {"ok": True}
+
+        stats = pool.stats()[server]
+        assert stats["requests"] == 3
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+    finally:
+        pool.close()
+
+
+def test_waits_counted_when_pool_is_full(server):
+    """Test that requests beyond max_connections queue and are counted as waits."""
+    KeepAliveServer.delay = 0.05
+    pool = HttpPool(max_connections=1)
+    try:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda _: pool.get(f"{server}/slow"), range(3)))
+
+        stats = pool.stats()[server]
+        assert stats["misses"] == 1
+        assert stats["waits"] >= 1
+        assert stats["wait_seconds"] > 0
+    finally:
+        pool.close()
+
+
+def test_pool_timeout_when_slots_stay_busy(server):
+    """Test that a request waiting for a slot gives up after the pool timeout."""
+    KeepAliveServer.delay = 0.5
+    pool = HttpPool(timeout=5, max_connections=1)
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            busy = executor.submit(pool.get, f"{server}/slow")
+            time.sleep(0.1)
+            with pytest.raises(httpx.PoolTimeout):
+                pool.get(f"{server}/slow", timeout=httpx.Timeout(5, pool=0.1))
+            busy.result()
+
+        assert pool.stats()[server]["waits"] == 1
+    finally:
+        pool.close()
+
+
+def test_get_pool_is_shared_per_process(monkeypatch):
+    """Test that executions in one worker get the same pool and a forked child does not."""
+    monkeypatch.setattr(http_pool, "_pool", None)
+    assert get_pool() is get_pool()
+
+    pool = get_pool()
+    monkeypatch.setattr(http_pool, "_pool_pid", -1)  # As seen from a forked child
+    assert get_pool() is not pool
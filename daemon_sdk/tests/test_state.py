@@ -0,0 +1,141 @@
+"""Tests for the workflow state API.
+
+These tests use LocalStateStore, so no Firestore documents are read or
+written.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from daemon_sdk import sdk
+from daemon_sdk.state import (
+    ExecutionState,
+    FirestoreStateStore,
+    LocalStateStore,
+    StateConflictError,
+    begin_execution,
+    end_execution,
+)
+
+
+def test_one_read_and_one_commit_per_execution():
+    """Test that state access is served from cache and written back in one commit."""
+    store = LocalStateStore()
+
+    begin_execution(store, "wf-1")
+    sdk.set_state("cursor", 10)
+    assert sdk.get_state("cursor") == 10
+    assert sdk.increment_state("runs") == 1
+    assert sdk.increment_state("runs") == 2
+    assert sdk.get_state("missing", default="x") == "x"
+    end_execution()
+
+    assert store.reads == 1
+    assert store.commits == 1
+
+    begin_execution(store, "wf-1")
+    assert sdk.get_state("cursor") == 10
+    assert sdk.get_state("runs") == 2
+    assert sdk.delete_state("cursor") is True
+    end_execution()
+
+    state = ExecutionState(store, "wf-1")
+    assert state.get("cursor") is None
+
+
+def test_concurrent_writes_conflict():
+    """Test that a stale read-modify-write is rejected instead of lost."""
+    store = LocalStateStore()
+    first = ExecutionState(store, "wf-1")
+    second = ExecutionState(store, "wf-1")
+
+    assert first.get("seen:42") is None
+    assert second.get("seen:42") is None
+    first.set("seen:42", True)
+    second.set("seen:42", True)
+    first.commit()
+
+    with pytest.raises(StateConflictError) as exc_info:
+        second.commit()
+    assert exc_info.value.keys == {"seen:42"}
+
+
+def test_delete_removes_key_without_tombstone():
+    """Test that deleted keys are dropped and a stale reader still conflicts with a recreated key."""
+    store = LocalStateStore()
+    setup = ExecutionState(store, "wf-1")
+    setup.set("seen:1", True)
+    setup.commit()
+
+    stale = ExecutionState(store, "wf-1")
+    assert stale.get("seen:1") is True
+
+    deleter = ExecutionState(store, "wf-1")
+    deleter.delete("seen:1")
+    deleter.commit()
+    assert "seen:1" not in store.load("wf-1")
+
+    recreator = ExecutionState(store, "wf-1")
+    recreator.set("seen:1", False)
+    recreator.commit()
+
+    stale.set("seen:1", "overwrite")
+    with pytest.raises(StateConflictError):
+        stale.commit()
+
+
+def test_firestore_store_drops_legacy_tombstones():
+    """Test that tombstones written by older versions are not loaded."""
+    db = MagicMock()
+    snapshot = db.collection.return_value.document.return_value.get.return_value
+    snapshot.exists = True
+    snapshot.to_dict.return_value = {"entries": {
+        "cursor": {"value": 10, "version": 3},
+        "seen:1": {"value": None, "version": 7},
+    }}
+
+    assert FirestoreStateStore(db).load("wf-1") == {"cursor": (10, 3)}
+
+
+def test_concurrent_increments_merge():
+    """Test that blind increments from concurrent runs are both applied."""
+    store = LocalStateStore()
+    first = ExecutionState(store, "wf-1")
+    second = ExecutionState(store, "wf-1")
+
+    first.increment("count", 2)
+    second.increment("count", 3)
+    first.commit()
+    second.commit()
+
+    assert ExecutionState(store, "wf-1").get("count") == 5
+
+
+def test_failed_execution_discards_changes():
+    """Test that end_execution(commit=False) leaves stored state untouched."""
+    store = LocalStateStore()
+
+    begin_execution(store, "wf-1")
+    sdk.set_state("cursor", 99)
+    end_execution(commit=False)
+
+    assert store.commits == 0
+    assert ExecutionState(store, "wf-1").get("cursor") is None
+
+
+def test_state_requires_running_execution():
+    """Test that the SDK functions fail clearly outside an execution."""
+    with pytest.raises(RuntimeError):
+        sdk.get_state("cursor")
+
+
+def test_none_values_rejected():
+    """Test that None cannot be stored (it means 'not set')."""
+    state = ExecutionState(LocalStateStore(), "wf-1")
+    with pytest.raises(ValueError):
+        state.set("cursor", None)
@@ -0,0 +1,96 @@
+"""Tests for lazy trigger payload parsing and streaming access."""
+
+import json
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add repository root to path so daemon_sdk imports as a package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from daemon_sdk import sdk, trigger
+from daemon_sdk.trigger import TriggerPayload, begin_trigger
+
+
+def test_get_trigger_data_parses_once():
+    """Test that the body is parsed on first access and cached afterwards."""
+    payload = begin_trigger(b'{"text": "hi", "user_name": "ada"}')
+    assert not payload.parsed
+
+    first = sdk.get_trigger_data()
+    assert first == {"text": "hi", "user_name": "ada"}
+    assert payload.parsed
+    assert sdk.get_trigger_data() is first
+
+
+def test_stdlib_fallback_without_orjson():
+    """Test parsing still works when orjson is not installed."""
+    with patch.object(trigger, "orjson", None):
+        assert TriggerPayload(b'{"a": 1}').data() == {"a": 1}
+
+
+def test_form_encoded_and_empty_bodies():
+    """Test Slack-style form bodies and empty bodies."""
+    form = TriggerPayload(b"text=hello+world&user_name=ada", "application/x-www-form-urlencoded; charset=utf-8")
+    assert form.data() == {"text": "hello world", "user_name": "ada"}
+    assert TriggerPayload(b"").data() == {}
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_items_streams_arrays(use_ijson):
+    """Test streaming a top-level array and an array under a key."""
+    if use_ijson and trigger.ijson is None:
+        pytest.skip("ijson not installed")
+    ijson = trigger.ijson if use_ijson else None
+    body = json.dumps({"ref": "main", "commits": [{"id": i, "msg": "x, ]"} for i in range(5)], "after": "abc"})
+
+    with patch.object(trigger, "ijson", ijson):
+        payload = TriggerPayload(body.encode())
+        assert [c["id"] for c in payload.iter_items("commits")] == [0, 1, 2, 3, 4]
+        assert list(payload.iter_items("missing")) == []
+        assert not payload.parsed
+        assert list(TriggerPayload(b" [1, [2], {\"a\": 3}] ").iter_items()) == [1, [2], {"a": 3}]
+        assert list(TriggerPayload(b"[]").iter_items()) == []
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_items_matches_data(use_ijson):
+    """Test that streamed items equal the parsed ones, numbers included."""
+    if use_ijson and trigger.ijson is None:
+        pytest.skip("ijson not installed")
+    ijson = trigger.ijson if use_ijson else None
+    body = b'{"items": [{"price": 1.5, "qty": 2}]}'
+
+    with patch.object(trigger, "ijson", ijson):
+        streamed = list(TriggerPayload(body).iter_items("items"))
+
+    assert streamed == TriggerPayload(body).data()["items"]
+    assert type(streamed[0]["price"]) is float
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_iter_items_wrong_shape_same_before_and_after_parse(use_ijson):
+    """Test that a key on an array body raises the same error whether or not it was parsed."""
+    if use_ijson and trigger.ijson is None:
+        pytest.skip("ijson not installed")
+    ijson = trigger.ijson if use_ijson else None
+
+    with patch.object(trigger, "ijson", ijson):
+        unparsed = TriggerPayload(b"[1, 2]")
+        with pytest.raises(ValueError):
+            list(unparsed.iter_items("commits"))
+
+        parsed = TriggerPayload(b"[1, 2]")
+        parsed.data()
+        with pytest.raises(ValueError):
+            list(parsed.iter_items("commits"))
+        assert list(parsed.iter_items()) == [1, 2]
+
+
+def test_chunks_are_zero_copy():
+    """Test that raw chunks are views over the original bytes."""
+    raw = b"x" * 10
+    chunks = list(TriggerPayload(raw).chunks(chunk_size=4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert chunks[0].obj is raw